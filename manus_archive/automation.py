@@ -1,9 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 import requests
 import json
 import os
-from datetime import datetime, timedelta
+import bisect
+import hashlib
+import fcntl
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 import random
+import copy
+import itertools
+import string
+import time
+import uuid
 
 automation_bp = Blueprint('automation', __name__)
 
@@ -63,20 +74,27 @@ CONTENT_TEMPLATES = [
     }
 ]
 
+PRODUCTS_BY_ID = {product['id']: product for product in PRODUCTS}
+TEMPLATES_BY_TYPE = {template['type']: template for template in CONTENT_TEMPLATES}
+
+# Upper bound on items generated by a single batch request
+MAX_BATCH_ITEMS = 1000
+
 @automation_bp.route('/generate-content', methods=['POST'])
 def generate_content():
     """Generate TikTok content based on product and template"""
     try:
         data = request.get_json()
-        product_id = data.get('product_id', random.choice(PRODUCTS)['id'])
-        template_type = data.get('template_type', random.choice(CONTENT_TEMPLATES)['type'])
+        rng = resolve_rng(seed=data.get('seed'))
+        product_id = data.get('product_id') or rng.choice(PRODUCTS)['id']
+        template_type = data.get('template_type') or rng.choice(CONTENT_TEMPLATES)['type']
         
         # Find product and template
-        product = next((p for p in PRODUCTS if p['id'] == product_id), PRODUCTS[0])
-        template = next((t for t in CONTENT_TEMPLATES if t['type'] == template_type), CONTENT_TEMPLATES[0])
+        product = PRODUCTS_BY_ID.get(product_id, PRODUCTS[0])
+        template = TEMPLATES_BY_TYPE.get(template_type, CONTENT_TEMPLATES[0])
         
         # Generate content based on template
-        content = generate_content_from_template(product, template)
+        content = generate_content_from_template(product, template, rng=rng)
         
         return jsonify({
             'success': True,
@@ -88,6 +106,77 @@ def generate_content():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@automation_bp.route('/generate-content/batch', methods=['POST'])
+def generate_content_batch_route():
+    """Generate many pieces of content in one call
+
+    Body: {"specs": [{"product_id": ..., "template_type": ..., "count": n}, ...], "stream": false, "seed": null}
+    With "stream": true (or Accept: application/x-ndjson) items are streamed as NDJSON, one per line.
+    The same seed and specs always produce the same items.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+
+        rng = resolve_rng(seed=data.get('seed'))
+        specs, error = validate_batch_specs(data.get('specs'), rng)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+
+        stream = data.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson'
+        if stream:
+            lines = (json.dumps(item) + '\n' for item in generate_content_batch(specs, rng))
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+        items = list(generate_content_batch(specs, rng))
+
+        return jsonify({
+            'success': True,
+            'items': items,
+            'count': len(items)
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@automation_bp.route('/variants', methods=['GET'])
+def list_variants():
+    """Page through the full variant space (?product_id=&template_type=&offset=&limit=&render=true)"""
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = min(request.args.get('limit', 100, type=int), MAX_BATCH_ITEMS)
+        product_ids = request.args.getlist('product_id')
+        template_types = request.args.getlist('template_type')
+        render = request.args.get('render', 'false').lower() == 'true'
+
+        if offset < 0:
+            return jsonify({'success': False, 'error': 'offset must be at least 0'}), 400
+        if limit < 1:
+            return jsonify({'success': False, 'error': 'limit must be at least 1'}), 400
+
+        variants = list(itertools.islice(enumerate_variants(product_ids, template_types), offset, offset + limit))
+        if render:
+            for variant in variants:
+                variant['content'] = render_variant(variant)
+
+        total = sum(
+            get_renderer(product, template).variant_count()
+            for product in PRODUCTS if not product_ids or product['id'] in product_ids
+            for template in CONTENT_TEMPLATES if not template_types or template['type'] in template_types
+        )
+
+        return jsonify({
+            'success': True,
+            'variants': variants,
+            'count': len(variants),
+            'total': total,
+            'cache': variant_cache.get_stats()
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @automation_bp.route('/schedule-post', methods=['POST'])
 def schedule_post():
     """Schedule a TikTok post"""
@@ -100,7 +189,7 @@ def schedule_post():
         # For now, we'll simulate the scheduling
         
         post_data = {
-            'id': f"post_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'id': f"post_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
             'content': content,
             'scheduled_for': schedule_time,
             'status': 'scheduled',
@@ -119,6 +208,45 @@ def schedule_post():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@automation_bp.route('/scheduled-posts', methods=['GET'])
+def list_scheduled_posts():
+    """List scheduled posts in a scheduled_for window (?start=&end=, ISO timestamps)"""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start = datetime.fromisoformat(start) if start else None
+        end = datetime.fromisoformat(end) if end else None
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid time window: {e}'}), 400
+
+    try:
+        posts = scheduled_posts.in_window(start, end)
+
+        return jsonify({
+            'success': True,
+            'posts': posts,
+            'count': len(posts)
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@automation_bp.route('/scheduled-posts/<post_id>', methods=['GET'])
+def get_scheduled_post(post_id):
+    """Get a single scheduled post by id"""
+    try:
+        post = scheduled_posts.get(post_id)
+        if not post:
+            return jsonify({'success': False, 'error': 'Scheduled post not found'}), 404
+
+        return jsonify({
+            'success': True,
+            'post': post
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @automation_bp.route('/automation-status', methods=['GET'])
 def automation_status():
     """Get current automation status and metrics"""
@@ -145,7 +273,7 @@ def automation_status():
 @automation_bp.route('/products', methods=['GET'])
 def get_products():
     """Get all available products"""
-    return jsonify({
+    return catalog_response({
         'success': True,
         'products': PRODUCTS
     })
@@ -153,11 +281,18 @@ def get_products():
 @automation_bp.route('/content-templates', methods=['GET'])
 def get_content_templates():
     """Get all content templates"""
-    return jsonify({
+    return catalog_response({
         'success': True,
         'templates': CONTENT_TEMPLATES
     })
 
+def catalog_response(body):
+    """JSON response with an ETag so clients can revalidate cached catalogs with a 304"""
+    response = jsonify(body)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @automation_bp.route('/analytics', methods=['GET'])
 def get_analytics():
     """Get content performance analytics"""
@@ -198,63 +333,84 @@ def get_analytics():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
-def generate_content_from_template(product, template):
-    """Generate specific content based on product and template"""
-    
-    # Select random benefit and ingredient
-    benefit = random.choice(product['benefits']).lower()
-    ingredient = random.choice(product['ingredients'])
-    
-    # Generate hook based on template
-    hook = template['hook']
-    if '{benefit}' in hook:
-        hook = hook.replace('{benefit}', benefit)
-    if '{ingredient}' in hook:
-        hook = hook.replace('{ingredient}', ingredient)
-    if '{timeframe}' in hook:
-        timeframes = ['2 weeks', '30 days', '1 month', '3 weeks']
-        hook = hook.replace('{timeframe}', random.choice(timeframes))
-    
-    # Generate CTA
-    cta = template['cta']
-    if '{benefit}' in cta:
-        cta = cta.replace('{benefit}', benefit)
-    if '{keyword}' in cta:
-        keywords = ['ENERGY', 'CALM', 'WELLNESS', 'NATURAL']
-        cta = cta.replace('{keyword}', random.choice(keywords))
-    
-    # Generate script based on template type
-    if template['type'] == 'grwm':
-        script = generate_grwm_script(product, hook, cta)
-    elif template['type'] == 'education':
-        script = generate_education_script(product, ingredient, hook, cta)
-    elif template['type'] == 'transformation':
-        script = generate_transformation_script(product, hook, cta)
-    elif template['type'] == 'myth_busting':
-        script = generate_myth_busting_script(product, hook, cta)
-    else:
-        script = generate_trending_script(product, hook, cta)
-    
-    return {
-        'hook': hook,
-        'script': script,
-        'cta': cta,
-        'hashtags': generate_hashtags(product, template['type']),
-        'visual_elements': generate_visual_elements(product, template['type'])
-    }
+def generate_content_from_template(product, template, count=None, rng=None, seed=None):
+    """Generate specific content based on product and template
+
+    With count set, returns a list of count pieces for the pair; the parts that only
+    depend on the product and template (compiled templates, hashtags, visual elements)
+    are resolved once for the whole list instead of once per piece. Pass rng (a
+    random.Random) or seed for reproducible output; the module-level random is the default.
+    """
+    rng = resolve_rng(rng, seed)
+    renderer = get_renderer(product, template)
+
+    contents = [renderer.render(renderer.draw(rng)) for _ in range(1 if count is None else count)]
+    return contents[0] if count is None else contents
+
+def resolve_rng(rng=None, seed=None):
+    """Pick the random source: an explicit rng, a fresh one for seed, or the module-level random"""
+    if rng is not None:
+        return rng
+    if seed is not None:
+        return random.Random(seed)
+    return random
+
+def generate_content_batch(specs, rng=None):
+    """Generate content for a list of {product_id, template_type, count} specs, yielding one item at a time"""
+    for spec in specs:
+        product = PRODUCTS_BY_ID[spec['product_id']]
+        template = TEMPLATES_BY_TYPE[spec['template_type']]
+
+        for content in generate_content_from_template(product, template, spec['count'], rng=rng):
+            yield {
+                'product_id': product['id'],
+                'template_type': template['type'],
+                'content': content
+            }
 
-def generate_grwm_script(product, hook, cta):
-    """Generate Get Ready With Me script"""
-    return f"""
+def validate_batch_specs(specs, rng=None):
+    """Fill in defaults and check a batch request; returns (specs, error)"""
+    rng = resolve_rng(rng)
+    if not isinstance(specs, list) or not specs:
+        return None, 'specs must be a non-empty list'
+
+    validated = []
+    for spec in specs:
+        if not isinstance(spec, dict):
+            return None, 'each spec must be an object'
+
+        product_id = spec.get('product_id') or rng.choice(PRODUCTS)['id']
+        template_type = spec.get('template_type') or rng.choice(CONTENT_TEMPLATES)['type']
+        count = spec.get('count', 1)
+
+        if product_id not in PRODUCTS_BY_ID:
+            return None, f'Unknown product_id: {product_id}'
+        if template_type not in TEMPLATES_BY_TYPE:
+            return None, f'Unknown template_type: {template_type}'
+        # bool is an int subclass, so 'count': true would otherwise pass as 1
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            return None, f'count must be a positive integer, got {count!r}'
+
+        validated.append({'product_id': product_id, 'template_type': template_type, 'count': count})
+
+    total = sum(spec['count'] for spec in validated)
+    if total > MAX_BATCH_ITEMS:
+        return None, f'Batch of {total} items exceeds the limit of {MAX_BATCH_ITEMS}'
+
+    return validated, None
+
+# Script bodies per template type; placeholders are filled by CompiledTemplate.render
+SCRIPT_BODIES = {
+    'grwm': """
 {hook}
 
 *Shows morning routine*
 
-First thing I do is take my {product['name']} - it's literally changed my entire morning energy.
+First thing I do is take my {product_name} - it's literally changed my entire morning energy.
 
 *Takes supplement with water*
 
-The {product['ingredients'][0]} in this gives me sustained energy without the crash I used to get from coffee.
+The {ingredient_0} in this gives me sustained energy without the crash I used to get from coffee.
 
 *Continues morning routine*
 
@@ -265,18 +421,15 @@ I've been taking this for a month now and the difference is incredible. No more
 {cta}
 
 #VitalFlowJourney #MorningRoutine #NaturalEnergy #WellnessTok
-"""
-
-def generate_education_script(product, ingredient, hook, cta):
-    """Generate educational content script"""
-    return f"""
+""",
+    'education': """
 {hook}
 
 Let me tell you about {ingredient} - this ingredient is a game changer.
 
 *Shows supplement bottle*
 
-{ingredient} is clinically proven to support {random.choice(product['benefits']).lower()}.
+{ingredient} is clinically proven to support {claim_benefit}.
 
 *Visual of ingredient or research*
 
@@ -284,16 +437,13 @@ Studies show it can improve your wellness in just 2-3 weeks of consistent use.
 
 *Shows taking supplement*
 
-That's why I chose {product['name']} - it has the right dosage of {ingredient} plus other powerful ingredients.
+That's why I chose {product_name} - it has the right dosage of {ingredient} plus other powerful ingredients.
 
 {cta}
 
-#WellnessEducation #{ingredient.replace(' ', '')} #SupplementFacts #NaturalWellness
-"""
-
-def generate_transformation_script(product, hook, cta):
-    """Generate transformation story script"""
-    return f"""
+#WellnessEducation #{ingredient_tag} #SupplementFacts #NaturalWellness
+""",
+    'transformation': """
 {hook}
 
 3 months ago I was struggling with low energy every single day.
@@ -304,7 +454,7 @@ I tried everything - more sleep, better diet, exercise - nothing worked.
 
 *Shows supplement*
 
-Then I discovered {product['name']} and everything changed.
+Then I discovered {product_name} and everything changed.
 
 *Shows 'after' state*
 
@@ -312,25 +462,13 @@ Now I wake up energized, stay focused all day, and actually enjoy my workouts.
 
 *Shows current routine*
 
-The {product['ingredients'][0]} and {product['ingredients'][1]} in this formula are scientifically proven to work.
+The {ingredient_0} and {ingredient_1} in this formula are scientifically proven to work.
 
 {cta}
 
 #TransformationTuesday #WellnessJourney #EnergyBoost #NaturalSupplements
-"""
-
-def generate_myth_busting_script(product, hook, cta):
-    """Generate myth-busting content script"""
-    myths = [
-        "All supplements are the same",
-        "Natural supplements don't work",
-        "You don't need supplements if you eat well",
-        "Supplements work immediately"
-    ]
-    
-    myth = random.choice(myths)
-    
-    return f"""
+""",
+    'myth_busting': """
 {hook}
 
 MYTH: {myth}
@@ -341,7 +479,7 @@ This is completely false and here's why:
 
 *Shows product and ingredients*
 
-{product['name']} contains {product['ingredients'][0]} which is clinically studied and proven effective.
+{product_name} contains {ingredient_0} which is clinically studied and proven effective.
 
 *Shows research or facts*
 
@@ -354,11 +492,8 @@ That's why I only trust brands that are third-party tested and science-backed.
 {cta}
 
 #MythBusting #SupplementFacts #WellnessEducation #ScienceBacked
-"""
-
-def generate_trending_script(product, hook, cta):
-    """Generate trending format script"""
-    return f"""
+""",
+    'trending': """
 {hook}
 
 *Uses trending audio/format*
@@ -367,20 +502,282 @@ POV: You discover the supplement that actually works
 
 *Shows supplement dramatically*
 
-Me before {product['name']}: tired, unfocused, struggling
+Me before {product_name}: tired, unfocused, struggling
 
 *Shows transformation*
 
-Me after {product['name']}: energized, clear-minded, thriving
+Me after {product_name}: energized, clear-minded, thriving
 
 *Shows ingredients*
 
-The secret? {product['ingredients'][0]} + {product['ingredients'][1]} in the perfect ratio.
+The secret? {ingredient_0} + {ingredient_1} in the perfect ratio.
 
 {cta}
 
 #POV #SupplementTok #WellnessTransformation #TikTokMadeMeBuyIt
 """
+}
+
+TIMEFRAMES = ['2 weeks', '30 days', '1 month', '3 weeks']
+KEYWORDS = ['ENERGY', 'CALM', 'WELLNESS', 'NATURAL']
+MYTHS = [
+    "All supplements are the same",
+    "Natural supplements don't work",
+    "You don't need supplements if you eat well",
+    "Supplements work immediately"
+]
+
+# Placeholders filled from a finite list of options per product, in the order they are drawn
+FIELD_OPTIONS = {
+    'benefit': lambda product: [benefit.lower() for benefit in product['benefits']],
+    'ingredient': lambda product: product['ingredients'],
+    'timeframe': lambda product: TIMEFRAMES,
+    'keyword': lambda product: KEYWORDS,
+    'claim_benefit': lambda product: [benefit.lower() for benefit in product['benefits']],
+    'myth': lambda product: MYTHS
+}
+
+# Placeholders computed from other values, with the option fields they depend on
+DERIVED_FIELDS = {
+    'ingredient_tag': (('ingredient',), lambda values: values['ingredient'].replace(' ', ''))
+}
+
+class CompiledTemplate:
+    """Template text parsed once into literal parts and placeholder slots
+
+    Rendering copies the parts, drops each value into its slot and joins, so it is a
+    single pass with no searching or re-parsing of the text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = []
+        self.slots = []
+
+        for literal, field, _, _ in string.Formatter().parse(text):
+            if literal:
+                self.parts.append(literal)
+            if field is not None:
+                self.slots.append((len(self.parts), field))
+                self.parts.append('')
+
+        self.fields = frozenset(field for _, field in self.slots)
+
+    def render(self, values):
+        parts = self.parts[:]
+        for index, field in self.slots:
+            parts[index] = values[field]
+        return ''.join(parts)
+
+def compile_content_template(template):
+    """Compile a CONTENT_TEMPLATES entry's hook and CTA"""
+    return {
+        'hook': CompiledTemplate(template['hook']),
+        'cta': CompiledTemplate(template['cta'])
+    }
+
+def product_values(product):
+    """Placeholder values that only depend on the product"""
+    return {
+        'product_name': product['name'],
+        'ingredient_0': product['ingredients'][0],
+        'ingredient_1': product['ingredients'][1]
+    }
+
+def render_script(template_type, product, hook, cta, rng=None, **values):
+    rng = resolve_rng(rng)
+    values.update(product_values(product), hook=hook, cta=cta)
+    compiled = COMPILED_SCRIPTS[template_type]
+
+    for field in FIELD_OPTIONS:
+        needed = field in compiled.fields or any(
+            field in DERIVED_FIELDS[derived][0] for derived in compiled.fields & DERIVED_FIELDS.keys()
+        )
+        if needed and field not in values:
+            values[field] = rng.choice(FIELD_OPTIONS[field](product))
+    for field in compiled.fields & DERIVED_FIELDS.keys():
+        values[field] = DERIVED_FIELDS[field][1](values)
+
+    return compiled.render(values)
+
+def generate_grwm_script(product, hook, cta, rng=None):
+    """Generate Get Ready With Me script"""
+    return render_script('grwm', product, hook, cta, rng)
+
+def generate_education_script(product, ingredient, hook, cta, rng=None):
+    """Generate educational content script"""
+    return render_script('education', product, hook, cta, rng, ingredient=ingredient)
+
+def generate_transformation_script(product, hook, cta, rng=None):
+    """Generate transformation story script"""
+    return render_script('transformation', product, hook, cta, rng)
+
+def generate_myth_busting_script(product, hook, cta, rng=None):
+    """Generate myth-busting content script"""
+    return render_script('myth_busting', product, hook, cta, rng)
+
+def generate_trending_script(product, hook, cta, rng=None):
+    """Generate trending format script"""
+    return render_script('trending', product, hook, cta, rng)
+
+# Compiled once at import; rendering never touches the source text again
+COMPILED_SCRIPTS = {template_type: CompiledTemplate(body) for template_type, body in SCRIPT_BODIES.items()}
+COMPILED_TEMPLATES = {template['type']: compile_content_template(template) for template in CONTENT_TEMPLATES}
+
+class VariantRenderer:
+    """Everything needed to render one product/template pair, resolved once
+
+    A variant is the set of option values (benefit, ingredient, timeframe, ...) that the
+    pair's templates actually use; rendering a variant is deterministic, so its id can be
+    computed from the inputs alone.
+    """
+
+    def __init__(self, product, template):
+        self.product = product
+        self.template = template
+        compiled = COMPILED_TEMPLATES.get(template['type']) or compile_content_template(template)
+        self.hook = compiled['hook']
+        self.cta = compiled['cta']
+        self.script = COMPILED_SCRIPTS.get(template['type'], COMPILED_SCRIPTS['trending'])
+        self.hashtags = generate_hashtags(product, template['type'])
+        self.visual_elements = generate_visual_elements(product, template['type'])
+        self.base_values = product_values(product)
+
+        fields = self.hook.fields | self.cta.fields | self.script.fields
+        self.derived_fields = [field for field in DERIVED_FIELDS if field in fields]
+        dependencies = {dependency for field in self.derived_fields for dependency in DERIVED_FIELDS[field][0]}
+        self.option_fields = [field for field in FIELD_OPTIONS if field in fields or field in dependencies]
+        self.options = {field: FIELD_OPTIONS[field](product) for field in self.option_fields}
+
+    def draw(self, rng):
+        """Pick one variant at random"""
+        return {field: rng.choice(self.options[field]) for field in self.option_fields}
+
+    def variants(self):
+        """Lazily enumerate every variant of the pair"""
+        for combination in itertools.product(*(self.options[field] for field in self.option_fields)):
+            yield dict(zip(self.option_fields, combination))
+
+    def variant_count(self):
+        count = 1
+        for field in self.option_fields:
+            count *= len(self.options[field])
+        return count
+
+    def variant_id(self, choices):
+        return compute_variant_id(self.product['id'], self.template['type'], choices)
+
+    def render(self, choices):
+        values = dict(self.base_values, **choices)
+        for field in self.derived_fields:
+            values[field] = DERIVED_FIELDS[field][1](values)
+        values['hook'] = self.hook.render(values)
+        values['cta'] = self.cta.render(values)
+
+        return {
+            'variant_id': self.variant_id(choices),
+            'hook': values['hook'],
+            'script': self.script.render(values),
+            'cta': values['cta'],
+            'hashtags': list(self.hashtags),
+            'visual_elements': {key: list(value) for key, value in self.visual_elements.items()}
+        }
+
+def compute_variant_id(product_id, template_type, choices):
+    """Stable id for a variant, derived only from its inputs"""
+    key = json.dumps([product_id, template_type, choices], sort_keys=True)
+    return f"variant_{hashlib.sha1(key.encode()).hexdigest()[:16]}"
+
+RENDERERS = {}
+
+def get_renderer(product, template):
+    """Get the renderer for a pair, reusing it for catalog entries"""
+    if PRODUCTS_BY_ID.get(product['id']) is not product or TEMPLATES_BY_TYPE.get(template['type']) is not template:
+        return VariantRenderer(product, template)
+
+    key = (product['id'], template['type'])
+    renderer = RENDERERS.get(key)
+    if renderer is None:
+        renderer = RENDERERS[key] = VariantRenderer(product, template)
+    return renderer
+
+def enumerate_variants(product_ids=None, template_types=None):
+    """Lazily yield every variant of the chosen products and templates as
+    {variant_id, product_id, template_type, choices}, in a stable order
+    """
+    for product in PRODUCTS:
+        if product_ids and product['id'] not in product_ids:
+            continue
+        for template in CONTENT_TEMPLATES:
+            if template_types and template['type'] not in template_types:
+                continue
+
+            renderer = get_renderer(product, template)
+            for choices in renderer.variants():
+                yield {
+                    'variant_id': renderer.variant_id(choices),
+                    'product_id': product['id'],
+                    'template_type': template['type'],
+                    'choices': choices
+                }
+
+class VariantCache:
+    """Bounded LRU of rendered variants keyed by variant id"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, variant_id):
+        with self.lock:
+            content = self.entries.get(variant_id)
+            if content is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(variant_id)
+            self.hits += 1
+            return copy.deepcopy(content)
+
+    def put(self, variant_id, content):
+        with self.lock:
+            self.entries[variant_id] = copy.deepcopy(content)
+            self.entries.move_to_end(variant_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+variant_cache = VariantCache()
+
+def render_variant(variant):
+    """Render an enumerated variant, serving it from the variant cache when it was rendered before"""
+    content = variant_cache.get(variant['variant_id'])
+    if content is None:
+        product = PRODUCTS_BY_ID[variant['product_id']]
+        template = TEMPLATES_BY_TYPE[variant['template_type']]
+        content = get_renderer(product, template).render(variant['choices'])
+        variant_cache.put(variant['variant_id'], content)
+    return content
+
+def benchmark_templates(renders=10000):
+    """Bulk-render every template type for one product; returns renders/sec per type"""
+    results = {}
+    for template in CONTENT_TEMPLATES:
+        started = time.perf_counter()
+        generate_content_from_template(PRODUCTS[0], template, renders)
+        results[template['type']] = round(renders / (time.perf_counter() - started), 1)
+    return results
 
 def generate_hashtags(product, content_type):
     """Generate relevant hashtags"""
@@ -425,25 +822,234 @@ def generate_visual_elements(product, content_type):
     
     return elements
 
+# Statuses after which a scheduled post can age out of the log under the retention policy
+TERMINAL_POST_STATUSES = ('posted', 'cancelled', 'failed')
+
+class ScheduledPostStore:
+    """Append-only JSON-lines log of scheduled posts, safe for concurrent writers in several processes
+
+    Every save appends one line with a single O_APPEND write, so appenders never block
+    each other; they only share a flock with compaction, which takes it exclusively.
+    The newest line for a post id wins. Each process keeps an in-memory index that is
+    refreshed by reading only the bytes appended since its last read.
+
+    Compaction drops superseded lines. Retention policy: a post that reached a terminal
+    status and was scheduled more than retention_days ago is dropped as well, so the log
+    stays bounded even though ids are never reused. Posts that are still pending are always
+    kept, however old. retention_days=None keeps every post.
+    """
+
+    def __init__(self, path, compact_after=1000, retention_days=30, compact_check_interval=100):
+        self.path = path
+        self.compact_after = compact_after
+        self.retention = timedelta(days=retention_days) if retention_days is not None else None
+        self.compact_check_interval = compact_check_interval
+        self.lock = threading.Lock()
+        self.posts = {}
+        self.window_index = []
+        self.window_index_stale = False
+        self.inode = None
+        self.offset = 0
+        self.lines = 0
+        self.next_compact_check = 0
+        self.prepared = False
+
+    def prepare(self):
+        """Create the log directory and import the legacy file on first use"""
+        if self.prepared:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.import_legacy_file()
+        self.prepared = True
+
+    def import_legacy_file(self):
+        """One-time import of the old whole-file JSON array next to the log"""
+        legacy_file = os.path.splitext(self.path)[0] + '.json'
+        if os.path.exists(self.path) or not os.path.exists(legacy_file):
+            return
+
+        try:
+            with open(legacy_file, 'r') as f:
+                posts = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping unreadable legacy scheduled posts file: {e}")
+            return
+
+        with self.locked_log(fcntl.LOCK_EX) as fd:
+            if os.fstat(fd).st_size == 0:
+                os.write(fd, ''.join(json.dumps(post) + '\n' for post in posts).encode())
+                os.fsync(fd)
+
+    @contextmanager
+    def locked_log(self, mode):
+        """Open the current log file and hold a flock on it, retrying if compaction swapped it"""
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, mode)
+                # Compaction may have replaced the file while we waited for the lock
+                try:
+                    current = os.fstat(fd).st_ino == os.stat(self.path).st_ino
+                except FileNotFoundError:
+                    current = False
+            except BaseException:
+                os.close(fd)
+                raise
+            if current:
+                break
+            os.close(fd)
+
+        try:
+            yield fd
+        finally:
+            os.close(fd)
+
+    def append(self, post_data):
+        """Durably append a post record; appending an existing id replaces that post"""
+        line = (json.dumps(post_data) + '\n').encode()
+        self.prepare()
+
+        with self.locked_log(fcntl.LOCK_SH) as fd:
+            os.write(fd, line)
+            os.fsync(fd)
+
+        self.compact()
+        return post_data
+
+    def refresh(self):
+        """Fold any lines appended since the last read (by any process) into the index"""
+        self.prepare()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # The log was compacted by another process; start over on the new file
+            self.posts = {}
+            self.lines = 0
+            self.next_compact_check = 0
+            self.inode = stat.st_ino
+            self.offset = 0
+            self.window_index_stale = True
+
+        if stat.st_size == self.offset:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        # Only consume complete lines; a line still being written is picked up next time
+        complete = data[:data.rfind(b'\n') + 1]
+        self.offset += len(complete)
+
+        for line in complete.splitlines():
+            self.lines += 1
+            try:
+                post = json.loads(line)
+            except ValueError:
+                continue
+            self.posts[post.get('id')] = post
+
+        self.window_index_stale = True
+
+    def get(self, post_id):
+        """Look up a post by id"""
+        with self.lock:
+            self.refresh()
+            return self.posts.get(post_id)
+
+    def in_window(self, start=None, end=None):
+        """List posts with start <= scheduled_for < end, soonest first
+
+        Times are compared in UTC; naive timestamps are taken as UTC. Posts whose
+        scheduled_for cannot be parsed are not listed.
+        """
+        with self.lock:
+            self.refresh()
+            if self.window_index_stale:
+                self.window_index = sorted(
+                    (scheduled_at, post_id)
+                    for post_id, post in self.posts.items()
+                    for scheduled_at in [to_utc(post.get('scheduled_for'))]
+                    if scheduled_at
+                )
+                self.window_index_stale = False
+
+            low = bisect.bisect_left(self.window_index, (to_utc(start),)) if start else 0
+            high = bisect.bisect_left(self.window_index, (to_utc(end),)) if end else len(self.window_index)
+            return [self.posts[post_id] for _, post_id in self.window_index[low:high]]
+
+    def count(self):
+        """Count distinct posts in the log"""
+        with self.lock:
+            self.refresh()
+            return len(self.posts)
+
+    def is_retired(self, post, cutoff):
+        """Whether compaction may drop a post: finished and scheduled before cutoff"""
+        if post.get('status') not in TERMINAL_POST_STATUSES:
+            return False
+        scheduled_at = to_utc(post.get('scheduled_for'))
+        return scheduled_at is not None and scheduled_at < cutoff
+
+    def retained_posts(self):
+        if self.retention is None:
+            return dict(self.posts)
+        cutoff = datetime.utcnow() - self.retention
+        return {post_id: post for post_id, post in self.posts.items() if not self.is_retired(post, cutoff)}
+
+    def compact(self, force=False):
+        """Rewrite the log without superseded lines and retired posts, once compact_after lines would go
+
+        Counting retired posts is a full scan, so it runs at most every compact_check_interval lines.
+        """
+        with self.lock:
+            self.refresh()
+            if not force:
+                if self.lines < self.next_compact_check:
+                    return False
+                self.next_compact_check = self.lines + self.compact_check_interval
+                if self.lines - len(self.retained_posts()) < self.compact_after:
+                    return False
+
+            with self.locked_log(fcntl.LOCK_EX) as fd:
+                # Pick up anything appended before we got the exclusive lock
+                self.refresh()
+                self.posts = self.retained_posts()
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as f:
+                    for post in self.posts.values():
+                        f.write(json.dumps(post) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                    # The new file's own stat: once it is in place, appenders may grow it
+                    stat = os.fstat(f.fileno())
+                os.replace(temp_path, self.path)
+
+                self.lines = len(self.posts)
+                self.next_compact_check = self.lines + self.compact_check_interval
+                self.window_index_stale = True
+                self.inode = stat.st_ino
+                self.offset = stat.st_size
+            return True
+
+def to_utc(value):
+    """Parse an ISO timestamp (or datetime) into naive UTC, taking naive values as UTC; None if unparseable"""
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+scheduled_posts = ScheduledPostStore('/home/ubuntu/vitalflow-automation-api/scheduled_posts.jsonl')
+
 def save_scheduled_post(post_data):
-    """Save scheduled post to database or file"""
-    # In a real implementation, this would save to a database
-    # For now, we'll save to a JSON file
-    
-    posts_file = '/home/ubuntu/vitalflow-automation-api/scheduled_posts.json'
-    
+    """Save scheduled post to the append-only scheduled post log"""
     try:
-        if os.path.exists(posts_file):
-            with open(posts_file, 'r') as f:
-                posts = json.load(f)
-        else:
-            posts = []
-        
-        posts.append(post_data)
-        
-        with open(posts_file, 'w') as f:
-            json.dump(posts, f, indent=2)
-            
+        scheduled_posts.append(post_data)
     except Exception as e:
         print(f"Error saving post: {e}")
-
@@ -0,0 +1,208 @@
+import importlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class AutomationAPIError(Exception):
+    """Raised when the automation API answers with success: false or an unusable response"""
+
+class AutomationAPIClient:
+    """HTTP transport: client for the automation API with pooled keep-alive connections, retries and a catalog cache
+
+    Products and templates change rarely, so they are served from memory for catalog_ttl
+    seconds and then revalidated with If-None-Match; a 304 just renews the entry. In steady
+    state generating content costs a single POST.
+    """
+
+    CATALOGS = {
+        'products': '/products',
+        'templates': '/content-templates'
+    }
+
+    def __init__(self, base_url="http://localhost:5000/api/automation", timeout=(3.05, 30),
+                 retries=3, backoff_factor=0.5, catalog_ttl=300, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.catalog_ttl = catalog_ttl
+        self.catalogs = {}
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'revalidated': 0, 'fetched': 0, 'stale_served': 0}
+
+        # Generation has no side effects on the server, so POSTs are safe to retry too
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST'])
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        with self.lock:
+            self.stats['requests'] += 1
+        return self.session.request(method, f"{self.base_url}{path}", **kwargs)
+
+    def parse(self, response, what):
+        try:
+            data = response.json()
+        except ValueError:
+            raise AutomationAPIError(f"Failed to {what}: HTTP {response.status_code} with a non-JSON body")
+
+        if not data.get('success'):
+            raise AutomationAPIError(f"Failed to {what}: {data.get('error', f'HTTP {response.status_code}')}")
+        return data
+
+    def get_catalog(self, name):
+        """Get a catalog ('products' or 'templates'), from cache while fresh, revalidating by ETag after"""
+        with self.lock:
+            entry = self.catalogs.get(name)
+            if entry and time.monotonic() - entry['fetched_at'] < self.catalog_ttl:
+                self.stats['cache_hits'] += 1
+                return entry['data']
+
+        headers = {'If-None-Match': entry['etag']} if entry and entry['etag'] else {}
+        try:
+            response = self.request('GET', self.CATALOGS[name], headers=headers)
+        except requests.RequestException as e:
+            if entry:
+                # Catalogs barely change; an old copy beats failing generation outright
+                print(f"Serving stale {name} catalog after request error: {e}")
+                with self.lock:
+                    self.stats['stale_served'] += 1
+                return entry['data']
+            raise
+
+        with self.lock:
+            if response.status_code == 304 and entry:
+                entry['fetched_at'] = time.monotonic()
+                self.stats['revalidated'] += 1
+                return entry['data']
+
+        data = self.parse(response, f"fetch {name}")[name]
+        with self.lock:
+            self.catalogs[name] = {
+                'data': data,
+                'etag': response.headers.get('ETag'),
+                'fetched_at': time.monotonic()
+            }
+            self.stats['fetched'] += 1
+        return data
+
+    def get_products(self):
+        return self.get_catalog('products')
+
+    def get_templates(self):
+        return self.get_catalog('templates')
+
+    def invalidate(self, name=None):
+        """Drop one cached catalog, or all of them"""
+        with self.lock:
+            if name:
+                self.catalogs.pop(name, None)
+            else:
+                self.catalogs.clear()
+
+    def generate_content(self, product_id, template_type):
+        """Generate one piece of content for a product and template"""
+        response = self.request('POST', '/generate-content', json={
+            'product_id': product_id,
+            'template_type': template_type
+        })
+        return self.parse(response, "generate content")['content']
+
+    def generate_content_batch(self, specs):
+        """Generate content for a list of {product_id, template_type, count} specs in one round trip"""
+        response = self.request('POST', '/generate-content/batch', json={'specs': specs})
+        return self.parse(response, "generate content batch")['items']
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.session.close()
+
+# Module paths the automation blueprint is deployed under, tried in order
+BLUEPRINT_MODULES = ('src.routes.automation', 'automation')
+
+def import_generation_core():
+    """Import the blueprint module that owns the catalogs and generator, or None if it is not importable"""
+    for module_name in BLUEPRINT_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        if hasattr(module, 'generate_content_from_template'):
+            return module
+    return None
+
+class InProcessTransport:
+    """In-process transport: calls the generation core directly, with no HTTP or JSON in between
+
+    Exposes the same methods as AutomationAPIClient so callers can use either.
+    """
+
+    def __init__(self, core):
+        self.core = core
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0}
+
+    def count_request(self):
+        with self.lock:
+            self.stats['requests'] += 1
+
+    def get_products(self):
+        return self.core.PRODUCTS
+
+    def get_templates(self):
+        return self.core.CONTENT_TEMPLATES
+
+    def invalidate(self, name=None):
+        pass
+
+    def generate_content(self, product_id, template_type):
+        """Generate one piece of content, falling back to the first product/template like the endpoint does"""
+        self.count_request()
+        product = self.core.PRODUCTS_BY_ID.get(product_id, self.core.PRODUCTS[0])
+        template = self.core.TEMPLATES_BY_TYPE.get(template_type, self.core.CONTENT_TEMPLATES[0])
+        return self.core.generate_content_from_template(product, template)
+
+    def generate_content_batch(self, specs):
+        self.count_request()
+        specs, error = self.core.validate_batch_specs(specs)
+        if error:
+            raise AutomationAPIError(f"Failed to generate content batch: {error}")
+        return list(self.core.generate_content_batch(specs))
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def close(self):
+        pass
+
+def create_client(base_url="http://localhost:5000/api/automation", transport='auto', **http_options):
+    """Build a client for the automation API
+
+    transport is 'inprocess', 'http', or 'auto' (in-process when the blueprint is importable,
+    HTTP otherwise). http_options are passed to AutomationAPIClient.
+    """
+    if transport not in ('auto', 'inprocess', 'http'):
+        raise ValueError(f"Unknown transport: {transport}")
+
+    if transport != 'http':
+        core = import_generation_core()
+        if core:
+            return InProcessTransport(core)
+        if transport == 'inprocess':
+            raise ImportError(f"Generation core not importable from any of {', '.join(BLUEPRINT_MODULES)}")
+        print("Generation core not importable, using the HTTP transport")
+
+    return AutomationAPIClient(base_url, **http_options)
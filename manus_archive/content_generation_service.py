@@ -1,14 +1,26 @@
-import requests
+import functools
 import json
 import os
 from datetime import datetime
 import random
 
+from automation_client import create_client
+from content_index import ContentIndex
+from content_store import TransitionJournal, atomic_write_json
+from image_render_pool import ImageRenderPool
+
 class ContentGenerationService:
-    def __init__(self, api_base_url="http://localhost:5000/api/automation"):
+    def __init__(self, api_base_url="http://localhost:5000/api/automation", transport='auto'):
         self.api_base_url = api_base_url
+        self.client = create_client(api_base_url, transport)
+        self.image_backend = 'default'
+        self.render_pool = ImageRenderPool(max_workers=4, backend_limits={'default': 3}, timeout_seconds=120)
         self.content_output_dir = "/home/ubuntu/generated_content"
         self.ensure_output_directory()
+        # Shared with the TikTok poster, which lists ready packages from the index only
+        self.content_index = ContentIndex(self.content_output_dir, posted_dir="/home/ubuntu/posted_content")
+        self.journal = TransitionJournal(os.path.join(self.content_output_dir, 'generation_transitions.journal'))
+        self.recover_transitions()
     
     def ensure_output_directory(self):
         """Ensure the output directory exists"""
@@ -18,41 +30,16 @@ class ContentGenerationService:
     def generate_automated_content(self):
         """Generate content automatically for TikTok posting"""
         try:
-            # Get products from API
-            products_response = requests.get(f"{self.api_base_url}/products")
-            products_data = products_response.json()
-            
-            if not products_data.get('success'):
-                raise Exception("Failed to fetch products")
-            
-            products = products_data['products']
-            
-            # Get content templates
-            templates_response = requests.get(f"{self.api_base_url}/content-templates")
-            templates_data = templates_response.json()
-            
-            if not templates_data.get('success'):
-                raise Exception("Failed to fetch templates")
-            
-            templates = templates_data['templates']
+            # Catalogs come from the client's cache; only generation needs a round trip
+            products = self.client.get_products()
+            templates = self.client.get_templates()
             
             # Generate content for random product and template
             selected_product = random.choice(products)
             selected_template = random.choice(templates)
             
             # Generate content via API
-            content_response = requests.post(f"{self.api_base_url}/generate-content", 
-                                           json={
-                                               'product_id': selected_product['id'],
-                                               'template_type': selected_template['type']
-                                           })
-            
-            content_data = content_response.json()
-            
-            if not content_data.get('success'):
-                raise Exception("Failed to generate content")
-            
-            content = content_data['content']
+            content = self.client.generate_content(selected_product['id'], selected_template['type'])
             
             # Generate visual content (images/videos)
             visual_content = self.generate_visual_content(selected_product, selected_template, content)
@@ -78,41 +65,44 @@ class ContentGenerationService:
             return None
     
     def generate_visual_content(self, product, template, content):
-        """Generate visual content (images/videos) for the post"""
+        """Generate visual content (images/videos) for the post
+
+        The images render concurrently; latency_ms records each one, and a failed
+        image is listed under failed while the others are still returned.
+        """
         visual_content = {
             'images': [],
             'videos': [],
-            'thumbnails': []
+            'thumbnails': [],
+            'latency_ms': {},
+            'failed': []
         }
         
-        try:
-            # Generate main content image based on template type
-            if template['type'] == 'grwm':
-                image_path = self.generate_grwm_image(product, content)
-            elif template['type'] == 'education':
-                image_path = self.generate_education_image(product, content)
-            elif template['type'] == 'transformation':
-                image_path = self.generate_transformation_image(product, content)
-            elif template['type'] == 'myth_busting':
-                image_path = self.generate_myth_busting_image(product, content)
-            else:
-                image_path = self.generate_trending_image(product, content)
-            
-            if image_path:
-                visual_content['images'].append(image_path)
-            
-            # Generate product showcase image
-            product_image_path = self.generate_product_showcase_image(product)
-            if product_image_path:
-                visual_content['images'].append(product_image_path)
-            
-            # Generate thumbnail for TikTok
-            thumbnail_path = self.generate_thumbnail_image(product, template)
-            if thumbnail_path:
-                visual_content['thumbnails'].append(thumbnail_path)
-            
-        except Exception as e:
-            print(f"Error generating visual content: {e}")
+        # Main content image based on template type
+        if template['type'] == 'grwm':
+            main_image = functools.partial(self.generate_grwm_image, product, content)
+        elif template['type'] == 'education':
+            main_image = functools.partial(self.generate_education_image, product, content)
+        elif template['type'] == 'transformation':
+            main_image = functools.partial(self.generate_transformation_image, product, content)
+        elif template['type'] == 'myth_busting':
+            main_image = functools.partial(self.generate_myth_busting_image, product, content)
+        else:
+            main_image = functools.partial(self.generate_trending_image, product, content)
+        
+        jobs = [
+            ('images', self.image_backend, main_image),
+            ('images', self.image_backend, functools.partial(self.generate_product_showcase_image, product)),
+            ('thumbnails', self.image_backend, functools.partial(self.generate_thumbnail_image, product, template))
+        ]
+        
+        for result in self.render_pool.run(jobs):
+            if not result['ok']:
+                print(f"Error generating visual content: {result['error']}")
+                visual_content['failed'].append(result['error'])
+            elif result['value']:
+                visual_content[result['name']].append(result['value'])
+                visual_content['latency_ms'][os.path.basename(result['value'])] = result['latency_ms']
         
         return visual_content
     
@@ -240,8 +230,9 @@ class ContentGenerationService:
         """Save content package to file"""
         filename = f"{self.content_output_dir}/content_package_{content_package['id']}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(content_package, f, indent=2)
+        atomic_write_json(filename, content_package)
+        
+        self.content_index.add(content_package, filename)
         
         print(f"Content package saved: {filename}")
     
@@ -254,8 +245,12 @@ class ContentGenerationService:
                 if filename.startswith('content_package_') and filename.endswith('.json'):
                     filepath = os.path.join(self.content_output_dir, filename)
                     
-                    with open(filepath, 'r') as f:
-                        content_package = json.load(f)
+                    try:
+                        with open(filepath, 'r') as f:
+                            content_package = json.load(f)
+                    except (OSError, ValueError) as e:
+                        print(f"Skipping unreadable content package {filename}: {e}")
+                        continue
                     
                     if content_package.get('status') == 'ready_for_posting':
                         ready_content.append(content_package)
@@ -277,8 +272,11 @@ class ContentGenerationService:
                 content_package['status'] = 'posted'
                 content_package['posted_at'] = datetime.now().isoformat()
                 
-                with open(filename, 'w') as f:
-                    json.dump(content_package, f, indent=2)
+                # Commit point: once journaled, recovery will finish the update even after a crash
+                self.journal.append(content_id, 'posted', posted_at=content_package['posted_at'])
+                self.apply_posted(content_package)
+                self.journal.append(content_id, 'done')
+                self.journal.compact()
                 
                 print(f"Content {content_id} marked as posted")
                 return True
@@ -287,6 +285,35 @@ class ContentGenerationService:
             print(f"Error marking content as posted: {e}")
         
         return False
+    
+    def apply_posted(self, content_package):
+        """Write a package's posted status to its file and the index; safe to repeat"""
+        filename = f"{self.content_output_dir}/content_package_{content_package['id']}.json"
+        
+        # Replace the file atomically; an in-place rewrite can leave truncated JSON on a crash
+        atomic_write_json(filename, content_package)
+        
+        self.content_index.update_status(content_package['id'], 'posted', path=filename,
+                                         posted_at=content_package['posted_at'])
+        return filename
+    
+    def recover_transitions(self):
+        """Finish posted transitions the journal recorded but a crash left unapplied"""
+        for content_id, record in self.journal.pending().items():
+            try:
+                with open(f"{self.content_output_dir}/content_package_{content_id}.json", 'r') as f:
+                    content_package = json.load(f)
+                
+                content_package['status'] = 'posted'
+                content_package['posted_at'] = record.get('posted_at') or content_package.get('posted_at')
+                self.apply_posted(content_package)
+                self.journal.append(content_id, 'done', recovered=True)
+                print(f"Recovered posted transition for {content_id}")
+            
+            except (OSError, ValueError) as e:
+                print(f"Cannot recover {content_id}: {e}")
+        
+        self.journal.compact(force=True)
 
 # Example usage and testing
 if __name__ == "__main__":
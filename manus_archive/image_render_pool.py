@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+class ImageRenderPool:
+    """Bounded thread pool that renders the images of a content package concurrently
+
+    Each job names the backend it runs on; a per-backend semaphore caps how many jobs hit
+    that backend at once, whatever the pool size. A batch waits at most timeout_seconds;
+    jobs still running then are reported as timed out while the others keep their results.
+    """
+
+    def __init__(self, max_workers=4, backend_limits=None, default_backend_limit=2, timeout_seconds=120):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-render')
+        self.backend_limits = dict(backend_limits or {})
+        self.default_backend_limit = default_backend_limit
+        self.timeout_seconds = timeout_seconds
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def backend_semaphore(self, backend):
+        with self.lock:
+            if backend not in self.semaphores:
+                limit = self.backend_limits.get(backend, self.default_backend_limit)
+                self.semaphores[backend] = threading.BoundedSemaphore(limit)
+            return self.semaphores[backend]
+
+    def run_job(self, backend, render):
+        submitted = time.perf_counter()
+        with self.backend_semaphore(backend):
+            started = time.perf_counter()
+            value = render()
+        finished = time.perf_counter()
+        return value, round((started - submitted) * 1000, 1), round((finished - started) * 1000, 1)
+
+    def run(self, jobs, timeout_seconds=None):
+        """Run (name, backend, render) jobs concurrently; returns one result per job, in order
+
+        A result is {'name', 'backend', 'ok', 'value' or 'error', 'latency_ms', 'wait_ms'}.
+        """
+        timeout_seconds = timeout_seconds or self.timeout_seconds
+        futures = [self.executor.submit(self.run_job, backend, render) for _, backend, render in jobs]
+        wait(futures, timeout=timeout_seconds)
+
+        results = []
+        for (name, backend, _), future in zip(jobs, futures):
+            result = {'name': name, 'backend': backend, 'ok': False}
+
+            if not future.done():
+                future.cancel()
+                result['error'] = f"timed out after {timeout_seconds}s"
+            elif future.exception():
+                result['error'] = str(future.exception())
+            else:
+                result['value'], result['wait_ms'], result['latency_ms'] = future.result()
+                result['ok'] = True
+
+            results.append(result)
+
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
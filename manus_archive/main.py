@@ -3,20 +3,24 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.automation import automation_bp
+from src.routes.media import media_bp, accel_prefix, send_media
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+app = Flask(__name__, static_folder=os.environ.get('STATIC_FOLDER', os.path.join(os.path.dirname(__file__), 'static')))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+# Behind the nginx container, hand file bodies to nginx instead of streaming them from Python
+app.config['MEDIA_ACCEL_REDIRECT'] = os.environ.get('MEDIA_ACCEL_REDIRECT') == '1'
 
 # Enable CORS for all routes
 CORS(app)
 
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(automation_bp, url_prefix='/api/automation')
+app.register_blueprint(media_bp, url_prefix='/api/media')
 
 # uncomment if you need to use database
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
@@ -32,14 +36,13 @@ def serve(path):
     if static_folder_path is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    response = send_media(static_folder_path, path, accel_prefix('static')) if path != "" else None
+    if response is None:
+        # Client-side routes get the app shell, revalidated on every load
+        response = send_media(static_folder_path, 'index.html', accel_prefix('static'), max_age=0)
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+from flask import Blueprint, Response, current_app, request, jsonify, send_file
+from urllib.parse import quote
+from werkzeug.security import safe_join
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import threading
+
+media_bp = Blueprint('media', __name__)
+
+GENERATED_IMAGES_DIR = os.environ.get('MEDIA_IMAGES_DIR', '/home/ubuntu/generated_content/images')
+
+# Internal nginx locations aliasing each media root (see docker/nginx/nginx.conf)
+ACCEL_LOCATIONS = {
+    'images': '/_media/images/',
+    'static': '/_media/static/'
+}
+
+DEFAULT_MAX_AGE = 24 * 3600
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Files whose name changes whenever their bytes do: sha256-named image cache and rendition
+# files, and hashed frontend build output (assets/index-BxY7a9Qk.js)
+CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{32,}\.\w+$|(^|/)assets/[^/]+-[A-Za-z0-9_-]{8,}\.\w+$')
+
+class ContentHashCache:
+    """sha256 ETags for served files, recomputed only when a file's mtime or size changes"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}  # path -> (mtime_ns, size, sha256)
+
+    def get(self, path, file_stat):
+        with self.lock:
+            known = self.entries.get(path)
+        if known and known[:2] == (file_stat.st_mtime_ns, file_stat.st_size):
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[path] = (file_stat.st_mtime_ns, file_stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+file_hashes = ContentHashCache()
+
+# Set by the nginx container on the requests it proxies (see docker/nginx/nginx.conf)
+ACCEL_REQUEST_HEADER = 'X-Media-Accel'
+
+def accel_prefix(root_name):
+    """Internal nginx location for a media root, or None when nginx hand-off is off
+
+    Hand-off also needs the request to have come through nginx; any other client would
+    get an empty body, since only nginx acts on X-Accel-Redirect.
+    """
+    if current_app.config.get('MEDIA_ACCEL_REDIRECT') and request.headers.get(ACCEL_REQUEST_HEADER) == '1':
+        return ACCEL_LOCATIONS[root_name]
+    return None
+
+def send_media(root, relative_path, accel_location=None, max_age=DEFAULT_MAX_AGE):
+    """Serve root/relative_path with a content-hash ETag, Range support and cache headers
+
+    Content-addressed files are cached for a year as immutable, others for max_age seconds
+    (revalidated every time when max_age is 0). With accel_location, the internal nginx
+    location aliasing root, the response is headers only plus X-Accel-Redirect and nginx
+    sends the bytes (and handles Range) with sendfile. Returns None if there is no such file.
+    """
+    path = safe_join(root, relative_path)
+    if path is None:
+        return None
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+
+    etag = file_hashes.get(path, file_stat)
+
+    if accel_location:
+        response = Response(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.set_etag(etag)
+        response.last_modified = file_stat.st_mtime
+        response.make_conditional(request)
+        if response.status_code == 200:
+            response.headers['X-Accel-Redirect'] = accel_location + quote(relative_path)
+    else:
+        # Range and If-None-Match handled by werkzeug; the body goes out through
+        # wsgi.file_wrapper, which gunicorn serves with sendfile
+        response = send_file(path, etag=etag, last_modified=file_stat.st_mtime, conditional=True, max_age=None)
+        response.cache_control.no_cache = None
+
+    if CONTENT_ADDRESSED.search(relative_path):
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    elif max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+
+    return response
+
+@media_bp.route('/images/<path:filename>', methods=['GET'])
+def get_image(filename):
+    """Serve a generated image (including cached artifacts and renditions)"""
+    response = send_media(GENERATED_IMAGES_DIR, filename, accel_prefix('images'))
+    if response is None:
+        return jsonify({'success': False, 'error': 'Image not found'}), 404
+    return response
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+VitalFlow Template Engine Benchmark
+Reports bulk render throughput (renders/sec) per content template type
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation_client import import_generation_core
+
+def main():
+    parser = argparse.ArgumentParser(description='VitalFlow Template Engine Benchmark')
+    parser.add_argument('--renders', '-n', type=int, default=10000,
+                       help='Renders per template type (default: 10000)')
+    parser.add_argument('--json', '-j', action='store_true',
+                       help='Output results in JSON format')
+
+    args = parser.parse_args()
+
+    core = import_generation_core()
+    if not core:
+        print("❌ Generation core is not importable")
+        sys.exit(1)
+
+    results = core.benchmark_templates(args.renders)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n📊 Template rendering, {args.renders} renders per type")
+    for template_type, renders_per_sec in results.items():
+        print(f"   {template_type:>14}: {renders_per_sec:>10} renders/sec")
+
+if __name__ == '__main__':
+    main()
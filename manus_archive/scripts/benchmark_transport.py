@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+VitalFlow Generation Transport Benchmark
+Compares per-item latency and throughput of in-process and HTTP content generation
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automation_client import AutomationAPIClient, InProcessTransport, import_generation_core
+
+def start_local_api(core, port):
+    """Serve the automation blueprint on a background thread for the HTTP run"""
+    from flask import Flask
+    from werkzeug.serving import make_server
+
+    # Keep per-request access logs out of the timings
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = Flask(__name__)
+    app.register_blueprint(core.automation_bp, url_prefix='/api/automation')
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{port}/api/automation"
+
+def run_benchmark(client, items, warmup):
+    """Generate items one at a time the way the generators do; returns latency stats"""
+    products = client.get_products()
+    templates = client.get_templates()
+
+    for _ in range(warmup):
+        client.generate_content(random.choice(products)['id'], random.choice(templates)['type'])
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(items):
+        item_started = time.perf_counter()
+        products = client.get_products()
+        templates = client.get_templates()
+        client.generate_content(random.choice(products)['id'], random.choice(templates)['type'])
+        latencies.append((time.perf_counter() - item_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'items': items,
+        'items_per_sec': round(items / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        'max_ms': round(latencies[-1], 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='VitalFlow Generation Transport Benchmark')
+    parser.add_argument('--items', '-n', type=int, default=500,
+                       help='Items to generate per transport (default: 500)')
+    parser.add_argument('--warmup', type=int, default=20,
+                       help='Untimed items before each run (default: 20)')
+    parser.add_argument('--url',
+                       help='Benchmark an already running API instead of a local one')
+    parser.add_argument('--port', type=int, default=5055,
+                       help='Port for the local API started for the HTTP run (default: 5055)')
+    parser.add_argument('--json', '-j', action='store_true',
+                       help='Output results in JSON format')
+
+    args = parser.parse_args()
+
+    core = import_generation_core()
+    if not core:
+        print("❌ Generation core is not importable; nothing to compare")
+        sys.exit(1)
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_local_api(core, args.port)
+
+    http_client = AutomationAPIClient(base_url)
+    try:
+        results = {
+            'inprocess': run_benchmark(InProcessTransport(core), args.items, args.warmup),
+            'http': run_benchmark(http_client, args.items, args.warmup)
+        }
+    finally:
+        http_client.close()
+        if server:
+            server.shutdown()
+
+    results['speedup'] = round(results['inprocess']['items_per_sec'] / results['http']['items_per_sec'], 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"\n📊 Content generation, {args.items} items per transport")
+    for mode in ('inprocess', 'http'):
+        stats = results[mode]
+        print(f"   {mode:>9}: {stats['items_per_sec']:>9} items/sec | "
+              f"mean {stats['mean_ms']} ms | p50 {stats['p50_ms']} ms | "
+              f"p95 {stats['p95_ms']} ms | max {stats['max_ms']} ms")
+    print(f"\n🚀 In-process is {results['speedup']}x faster than HTTP")
+
+if __name__ == '__main__':
+    main()
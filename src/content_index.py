@@ -0,0 +1,269 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+INSERT_SQL = '''
+    INSERT OR REPLACE INTO content_index
+    (content_id, status, generated_at, path, updated_at, template_type, product_name, posted_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Columns added after the first release, with their types, for in-place migration
+ADDED_COLUMNS = {
+    'template_type': 'TEXT',
+    'product_name': 'TEXT',
+    'posted_at': 'TEXT',
+    'attempts': 'INTEGER DEFAULT 0',
+    'not_before': 'TEXT'
+}
+
+class ContentIndex:
+    """Persistent SQLite index of content packages keyed by status and generation time"""
+
+    def __init__(self, content_dir="/home/ubuntu/generated_content", db_path=None, posted_dir=None):
+        self.content_dir = content_dir
+        self.posted_dir = posted_dir
+        self.db_path = db_path or os.path.join(content_dir, "content_index.db")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        # Lets INSERT OR REPLACE fire the delete trigger so rollups stay exact
+        self.conn.execute('PRAGMA recursive_triggers=ON')
+        schema_changed = self.init_database()
+
+        if schema_changed or self.count() == 0:
+            self.rebuild()
+
+    def init_database(self):
+        """Create the index and rollup tables; returns True if an existing index was migrated"""
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS content_index (
+                    content_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    generated_at TEXT NOT NULL DEFAULT '',
+                    path TEXT NOT NULL,
+                    updated_at TEXT,
+                    template_type TEXT,
+                    product_name TEXT,
+                    posted_at TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    not_before TEXT
+                )
+            ''')
+
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(content_index)')}
+            missing = [column for column in ADDED_COLUMNS if column not in columns]
+            for column in missing:
+                self.conn.execute(f'ALTER TABLE content_index ADD COLUMN {column} {ADDED_COLUMNS[column]}')
+
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_content_status_generated
+                ON content_index (status, generated_at, content_id)
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_content_status_posted
+                ON content_index (status, posted_at)
+            ''')
+
+            # Running post counts per template, product and day
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS posting_rollups (
+                    dimension TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    posts INTEGER DEFAULT 0,
+                    PRIMARY KEY (dimension, key)
+                )
+            ''')
+            for name, event, when, row, sign in (
+                ('posting_rollup_insert', 'AFTER INSERT', "NEW.status = 'posted'", 'NEW', 1),
+                ('posting_rollup_update', 'AFTER UPDATE OF status',
+                 "NEW.status = 'posted' AND OLD.status != 'posted'", 'NEW', 1),
+                ('posting_rollup_unpost', 'AFTER UPDATE OF status',
+                 "OLD.status = 'posted' AND NEW.status != 'posted'", 'OLD', -1),
+                ('posting_rollup_delete', 'AFTER DELETE', "OLD.status = 'posted'", 'OLD', -1)
+            ):
+                self.conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {name} {event} ON content_index
+                    WHEN {when}
+                    BEGIN
+                        INSERT INTO posting_rollups (dimension, key, posts)
+                        VALUES ('template', COALESCE({row}.template_type, 'unknown'), {sign}),
+                               ('product', COALESCE({row}.product_name, 'unknown'), {sign}),
+                               ('day', COALESCE(substr({row}.posted_at, 1, 10), 'unknown'), {sign})
+                        ON CONFLICT(dimension, key) DO UPDATE SET posts = posts + excluded.posts;
+                    END
+                ''')
+            self.conn.commit()
+
+        return bool(missing)
+
+    def rebuild(self):
+        """Rebuild the index from the package files on disk (one-time directory scan)"""
+        rows = []
+
+        for directory, prefix in ((self.content_dir, 'content_package_'), (self.posted_dir, 'posted_')):
+            if not directory or not os.path.exists(directory):
+                continue
+
+            for filename in os.listdir(directory):
+                if filename.startswith(prefix) and filename.endswith('.json'):
+                    filepath = os.path.join(directory, filename)
+                    try:
+                        with open(filepath, 'r') as f:
+                            content_package = json.load(f)
+                    except (OSError, ValueError) as e:
+                        print(f"Skipping unreadable content package {filename}: {e}")
+                        continue
+
+                    rows.append(self._row(content_package, filepath))
+
+        with self.lock:
+            self.conn.executemany(INSERT_SQL, rows)
+            self.conn.commit()
+
+        if rows:
+            print(f"🗂️ Content index rebuilt with {len(rows)} packages")
+        return len(rows)
+
+    def _row(self, content_package, path):
+        return (
+            content_package['id'],
+            content_package.get('status', 'unknown'),
+            content_package.get('generated_at', ''),
+            path,
+            datetime.now().isoformat(),
+            content_package.get('template', {}).get('type'),
+            content_package.get('product', {}).get('name'),
+            content_package.get('posted_at')
+        )
+
+    def add(self, content_package, path):
+        """Insert or update the index entry for a saved content package"""
+        with self.lock:
+            self.conn.execute(INSERT_SQL, self._row(content_package, path))
+            self.conn.commit()
+
+    def update_status(self, content_id, status, path=None, posted_at=None):
+        """Record a status transition (and optionally a new file location)"""
+        with self.lock:
+            self.conn.execute('''
+                UPDATE content_index
+                SET status = ?, path = COALESCE(?, path), posted_at = COALESCE(?, posted_at), updated_at = ?
+                WHERE content_id = ?
+            ''', (status, path, posted_at, datetime.now().isoformat(), content_id))
+            self.conn.commit()
+
+    def remove(self, content_id):
+        """Drop an entry from the index"""
+        with self.lock:
+            self.conn.execute('DELETE FROM content_index WHERE content_id = ?', (content_id,))
+            self.conn.commit()
+
+    def get(self, content_id):
+        """Get the index entry for a single package"""
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT content_id, status, generated_at, path
+                FROM content_index WHERE content_id = ?
+            ''', (content_id,)).fetchone()
+        return self._entry(row) if row else None
+
+    def oldest(self, status='ready_for_posting'):
+        """Get the oldest entry with the given status"""
+        entries = self.list_entries(status, limit=1)
+        return entries[0] if entries else None
+
+    def list_entries(self, status='ready_for_posting', limit=None, offset=0, due_only=False, after=None):
+        """List entries with the given status, oldest first (optionally only those not backing off)
+
+        after is a (generated_at, content_id) position: only entries past it are listed, which
+        seeks straight there on the (status, generated_at, content_id) index instead of skipping
+        offset rows.
+        """
+        query = '''
+            SELECT content_id, status, generated_at, path
+            FROM content_index WHERE status = ?
+            {filters}
+            ORDER BY generated_at, content_id
+            LIMIT ? OFFSET ?
+        '''
+        params = [status]
+        filters = []
+        if due_only:
+            filters.append('AND (not_before IS NULL OR not_before <= ?)')
+            params.append(datetime.now().isoformat())
+        if after:
+            filters.append('AND (generated_at, content_id) > (?, ?)')
+            params += list(after)
+        params += [-1 if limit is None else limit, offset]
+
+        with self.lock:
+            rows = self.conn.execute(query.format(filters=' '.join(filters)), params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def record_failure(self, content_id):
+        """Count a failed posting attempt; returns the new attempt count"""
+        with self.lock:
+            self.conn.execute('''
+                UPDATE content_index SET attempts = COALESCE(attempts, 0) + 1, updated_at = ?
+                WHERE content_id = ?
+            ''', (datetime.now().isoformat(), content_id))
+            self.conn.commit()
+            row = self.conn.execute('SELECT attempts FROM content_index WHERE content_id = ?', (content_id,)).fetchone()
+        return row[0] if row else 0
+
+    def defer(self, content_id, not_before):
+        """Hold an entry back from due-only listings until not_before (ISO timestamp)"""
+        with self.lock:
+            self.conn.execute('''
+                UPDATE content_index SET not_before = ?, updated_at = ? WHERE content_id = ?
+            ''', (not_before, datetime.now().isoformat(), content_id))
+            self.conn.commit()
+
+    def count(self, status=None):
+        """Count indexed packages, optionally filtered by status"""
+        with self.lock:
+            if status:
+                row = self.conn.execute('SELECT COUNT(*) FROM content_index WHERE status = ?', (status,)).fetchone()
+            else:
+                row = self.conn.execute('SELECT COUNT(*) FROM content_index').fetchone()
+        return row[0]
+
+    def recent(self, status='posted', limit=5):
+        """List the most recently posted entries, newest first"""
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT content_id, status, generated_at, path
+                FROM content_index WHERE status = ?
+                ORDER BY posted_at DESC LIMIT ?
+            ''', (status, limit)).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def rollup(self, dimension):
+        """Get post counts for one rollup dimension ('template', 'product' or 'day')"""
+        with self.lock:
+            rows = self.conn.execute('''
+                SELECT key, posts FROM posting_rollups
+                WHERE dimension = ? AND posts > 0
+            ''', (dimension,)).fetchall()
+        return dict(rows)
+
+    def rollup_count(self, dimension, key):
+        """Get the post count for a single rollup key"""
+        with self.lock:
+            row = self.conn.execute('''
+                SELECT posts FROM posting_rollups WHERE dimension = ? AND key = ?
+            ''', (dimension, key)).fetchone()
+        return row[0] if row else 0
+
+    def _entry(self, row):
+        return {
+            'id': row[0],
+            'status': row[1],
+            'generated_at': row[2],
+            'path': row[3]
+        }
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+def atomic_write_json(path, data):
+    """Write JSON so readers see either the old file or the complete new one, never a torn write"""
+    directory = os.path.dirname(path) or '.'
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    # Persist the rename itself
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+# Each transition is journaled before it is applied, so after a crash the last
+# record per package says exactly how far it got:
+#   posting -> the upload was started, outcome unknown
+#   posted  -> the upload succeeded (commit point), files may not be moved yet
+#   done    -> fully applied
+#   failed  -> the upload was rejected, nothing to apply
+class TransitionJournal:
+    """Append-only, fsynced journal of content package state transitions"""
+
+    def __init__(self, path, compact_after=1000):
+        self.path = path
+        self.compact_after = compact_after
+        self.lock = threading.Lock()
+        self.records_since_compaction = 0
+        self.repair()
+
+    def repair(self):
+        """Drop a torn final line so the next append starts on a fresh line"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def append(self, content_id, state, **details):
+        """Durably record a transition"""
+        record = {'content_id': content_id, 'state': state, 'at': datetime.now().isoformat()}
+        record.update(details)
+
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.records_since_compaction += 1
+
+        return record
+
+    def pending(self):
+        """Get the last record of every transition that is not finished (state posting or posted)"""
+        with self.lock:
+            return self._read_pending()
+
+    def _read_pending(self):
+        latest = {}
+
+        if not os.path.exists(self.path):
+            return latest
+
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                latest[record['content_id']] = record
+
+        return {
+            content_id: record for content_id, record in latest.items()
+            if record['state'] in ('posting', 'posted')
+        }
+
+    def compact(self, force=False):
+        """Rewrite the journal keeping only unfinished transitions"""
+        with self.lock:
+            if not force and self.records_since_compaction < self.compact_after:
+                return
+
+            pending = self._read_pending()
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                for record in pending.values():
+                    f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self.records_since_compaction = 0
+
+# Keys that differ between otherwise identical packages
+VOLATILE_KEYS = {'id', 'variant_id', 'generated_at', 'path', 'timestamp'}
+
+def normalize_for_hash(value):
+    """Canonical form of generated content: whitespace collapsed, keys sorted, volatile keys dropped"""
+    if isinstance(value, dict):
+        return {key: normalize_for_hash(item) for key, item in sorted(value.items()) if key not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [normalize_for_hash(item) for item in value]
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    return value
+
+def content_hash(content, image_prompts=()):
+    """Content address of a package: hash of its normalized content and image prompts"""
+    payload = json.dumps([normalize_for_hash(content), normalize_for_hash(list(image_prompts))], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ContentDedupStore:
+    """Content-addressed SQLite store of generated packages
+
+    Packages are keyed by content_hash so a duplicate is caught before any image work is
+    done. Image artifacts are shared through the image cache, keyed by prompt.
+    """
+
+    def __init__(self, db_path="/home/ubuntu/generated_content/content_dedup.db"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.stats = {'package_lookups': 0, 'package_hits': 0}
+        self.init_database()
+
+    def init_database(self):
+        with self.lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS content_hashes (
+                    content_hash TEXT PRIMARY KEY,
+                    content_id TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    hits INTEGER DEFAULT 0
+                )
+            ''')
+            self.conn.commit()
+
+    def find_package(self, content_hash):
+        """Get the id of the package already stored under this hash, counting the lookup"""
+        with self.lock:
+            self.stats['package_lookups'] += 1
+            row = self.conn.execute(
+                'SELECT content_id FROM content_hashes WHERE content_hash = ?', (content_hash,)
+            ).fetchone()
+            if row:
+                self.stats['package_hits'] += 1
+                self.conn.execute('UPDATE content_hashes SET hits = hits + 1 WHERE content_hash = ?', (content_hash,))
+                self.conn.commit()
+        return row[0] if row else None
+
+    def add_package(self, content_hash, content_id):
+        with self.lock:
+            self.conn.execute('''
+                INSERT OR IGNORE INTO content_hashes (content_hash, content_id, created_at)
+                VALUES (?, ?, ?)
+            ''', (content_hash, content_id, datetime.now().isoformat()))
+            self.conn.commit()
+
+    def get_stats(self):
+        """Lookup and hit counts since start, plus the stored total"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['packages_stored'] = self.conn.execute('SELECT COUNT(*) FROM content_hashes').fetchone()[0]
+
+        lookups = stats['package_lookups']
+        stats['package_hit_rate'] = round(stats['package_hits'] / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+from image_compositor import ASSETS_DIR, Compositor, benchmark_compositor
+
+class ImageBackend:
+    """Interface every image generation backend implements
+
+    A request is a dict with at least prompt, image_type, width, height and format,
+    plus product_id/product_name. Backends advertise how they want to be driven:
+    max_concurrency is the number of renders the caller may run at once against this
+    backend, and max_batch_size the most requests render_batch accepts in one call.
+    image_types lists the image types it can render, or is None for any.
+    """
+
+    name = 'base'
+    max_concurrency = 1
+    max_batch_size = 1
+    image_types = None
+
+    def render(self, request, output_path):
+        """Render one request to output_path"""
+        raise NotImplementedError
+
+    def render_batch(self, jobs):
+        """Render a list of (request, output_path); backends with a real batch API override this"""
+        for request, output_path in jobs:
+            self.render(request, output_path)
+
+    def get_stats(self):
+        return {'backend': self.name}
+
+# Background gradients per image type, one pair picked per prompt
+PALETTES = {
+    'grwm': [((255, 236, 210), (252, 182, 159)), ((255, 248, 231), (247, 206, 180))],
+    'education': [((224, 242, 241), (128, 203, 196)), ((227, 242, 253), (100, 181, 246))],
+    'transformation': [((66, 66, 66), (255, 213, 79)), ((84, 110, 122), (129, 199, 132))],
+    'myth_busting': [((239, 83, 80), (102, 187, 106)), ((229, 57, 53), (67, 160, 71))],
+    'trending': [((236, 64, 122), (126, 87, 194)), ((255, 64, 129), (41, 121, 255))],
+    'product_showcase': [((250, 250, 250), (224, 224, 224)), ((255, 255, 255), (238, 238, 238))],
+    'thumbnail': [((255, 235, 59), (255, 152, 0)), ((3, 169, 244), (0, 188, 212))]
+}
+
+CAPTIONS = {
+    'grwm': 'GET READY WITH ME',
+    'education': 'INGREDIENT SPOTLIGHT',
+    'transformation': 'BEFORE  →  AFTER',
+    'myth_busting': 'MYTH vs FACT',
+    'trending': 'POV: IT ACTUALLY WORKS',
+    'product_showcase': '',
+    'thumbnail': 'WATCH THIS'
+}
+
+class LocalPillowBackend(ImageBackend):
+    """Deterministic offline renderer that composes real images from the brand assets
+
+    The same request always produces the same pixels: all variation comes from an RNG
+    seeded with the request's hash. Needs no network or GPU, so it stands in for a real
+    generator when measuring the visual pipeline.
+    """
+
+    name = 'local'
+
+    def __init__(self, assets_dir=ASSETS_DIR, max_concurrency=4, max_batch_size=8):
+        self.assets_dir = assets_dir
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+
+    def request_seed(self, request):
+        payload = json.dumps(request, sort_keys=True)
+        return int(hashlib.sha256(payload.encode()).hexdigest()[:16], 16)
+
+    def packaging_asset(self, product_id):
+        """Packaging shot for a product (vitalflow_energy -> vitalflow_packaging_energy.png), or the logo"""
+        path = os.path.join(self.assets_dir, f"vitalflow_packaging_{product_id.split('_')[-1]}.png")
+        if not os.path.exists(path):
+            path = os.path.join(self.assets_dir, 'vitalflow_logo_primary.png')
+        return path
+
+    def load_asset(self, path, max_size):
+        with Image.open(path) as asset:
+            asset = asset.convert('RGBA')
+        asset.thumbnail(max_size, Image.Resampling.LANCZOS)
+        return asset
+
+    def render(self, request, output_path):
+        width, height = request['width'], request['height']
+        image_type = request['image_type']
+        rng = random.Random(self.request_seed(request))
+
+        # Vertical gradient background
+        top, bottom = rng.choice(PALETTES.get(image_type, PALETTES['trending']))
+        mask = Image.linear_gradient('L').resize((width, height))
+        canvas = Image.composite(Image.new('RGB', (width, height), bottom),
+                                 Image.new('RGB', (width, height), top), mask).convert('RGBA')
+
+        # Brand logo at the top, packaging shot as the hero
+        logo = self.load_asset(os.path.join(self.assets_dir, 'vitalflow_logo_primary.png'),
+                               (width * 2 // 5, height // 8))
+        canvas.alpha_composite(logo, ((width - logo.width) // 2, height // 20))
+
+        product = self.load_asset(self.packaging_asset(request.get('product_id', '')),
+                                  (width * 3 // 4, height // 2))
+        offset_x = rng.randint(-width // 20, width // 20)
+        canvas.alpha_composite(product, ((width - product.width) // 2 + offset_x, height // 4))
+
+        # Caption band with the template caption and product name
+        draw = ImageDraw.Draw(canvas, 'RGBA')
+        band_top = height * 4 // 5
+        draw.rectangle((0, band_top, width, height), fill=(0, 0, 0, 150))
+        caption = CAPTIONS.get(image_type, '')
+        title_font = ImageFont.load_default(size=max(12, width // 14))
+        body_font = ImageFont.load_default(size=max(10, width // 22))
+        if caption:
+            draw.text((width // 2, band_top + height // 30), caption, font=title_font, fill='white', anchor='mt')
+        draw.text((width // 2, height - height // 20), request.get('product_name', ''),
+                  font=body_font, fill='white', anchor='mb')
+
+        image_format = request.get('format', 'png').upper()
+        if image_format in ('JPEG', 'JPG'):
+            canvas.convert('RGB').save(output_path, 'JPEG', quality=90)
+        else:
+            canvas.save(output_path, image_format)
+
+    def get_stats(self):
+        return {'backend': self.name, 'assets_dir': self.assets_dir}
+
+class CompositorBackend(ImageBackend):
+    """Template layouts composited from pre-decoded brand assets and cached text
+
+    For image types that are a fixed arrangement of brand assets and labels (thumbnails,
+    myth vs fact and before/after splits) there is nothing to generate: a render is a few
+    pastes, fast enough to run hundreds of images per second per process.
+    """
+
+    name = 'compositor'
+    image_types = ('thumbnail', 'myth_busting', 'transformation')
+
+    def __init__(self, assets_dir=ASSETS_DIR, max_concurrency=4, max_batch_size=8):
+        self.compositor = Compositor(assets_dir)
+        self.max_concurrency = max_concurrency
+        self.max_batch_size = max_batch_size
+
+    def render(self, request, output_path):
+        if request['image_type'] not in self.compositor.layouts:
+            raise ValueError(f"No compositor layout for image type: {request['image_type']}")
+        self.compositor.render(request, output_path)
+
+    def get_stats(self):
+        return dict(self.compositor.get_stats(), backend=self.name)
+
+IMAGE_BACKENDS = {
+    'local': LocalPillowBackend,
+    'compositor': CompositorBackend
+}
+
+def create_backend(name='local', **options):
+    """Instantiate a registered image backend by name"""
+    if name not in IMAGE_BACKENDS:
+        raise ValueError(f"Unknown image backend: {name}")
+    return IMAGE_BACKENDS[name](**options)
+
+def benchmark_backend(backend, images=32, concurrency=None, batch_size=None, width=540, height=960):
+    """Render images through a backend and report throughput, latency and peak memory"""
+    concurrency = concurrency or backend.max_concurrency
+    batch_size = batch_size or backend.max_batch_size
+    image_types = list(backend.image_types or PALETTES)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        jobs = [
+            ({
+                'prompt': f"benchmark image {i}",
+                'image_type': image_types[i % len(image_types)],
+                'product_id': 'vitalflow_energy' if i % 2 else 'vitalflow_calm',
+                'product_name': 'VitalFlow Energy' if i % 2 else 'VitalFlow Calm',
+                'width': width,
+                'height': height,
+                'format': 'png'
+            }, os.path.join(output_dir, f"image_{i}.png"))
+            for i in range(images)
+        ]
+        batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+        latencies = []
+
+        def run_batch(batch):
+            started = time.perf_counter()
+            backend.render_batch(batch)
+            latencies.append((time.perf_counter() - started) * 1000 / len(batch))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_batch, batches))
+        elapsed = time.perf_counter() - started
+
+        output_bytes = sum(os.path.getsize(path) for _, path in jobs)
+
+    return {
+        'backend': backend.name,
+        'images': images,
+        'concurrency': concurrency,
+        'batch_size': batch_size,
+        'images_per_sec': round(images / elapsed, 2),
+        'mean_ms_per_image': round(sum(latencies) / len(latencies), 1),
+        'avg_output_kb': round(output_bytes / images / 1024, 1),
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='VitalFlow Image Backend Benchmark')
+    parser.add_argument('--backend', '-b', default='local', choices=sorted(IMAGE_BACKENDS),
+                        help='Backend to benchmark (default: local)')
+    parser.add_argument('--images', '-n', type=int, default=32, help='Images to render (default: 32)')
+    parser.add_argument('--concurrency', '-c', type=int, help="Concurrent renders (default: backend's limit)")
+    parser.add_argument('--batch-size', type=int, help="Requests per render_batch call (default: backend's limit)")
+    parser.add_argument('--size', default='540x960', help='Image size WIDTHxHEIGHT (default: 540x960)')
+    parser.add_argument('--layouts', action='store_true',
+                        help='Compositor only: renders/sec per layout, in memory and encoded as JPEG')
+
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split('x'))
+
+    if args.layouts:
+        compositor = Compositor()
+        results = {
+            'compose_per_sec': benchmark_compositor(compositor, args.images, width, height),
+            'compose_and_encode_per_sec': benchmark_compositor(compositor, args.images, width, height, 'JPEG'),
+            'caches': compositor.get_stats()
+        }
+    else:
+        results = benchmark_backend(create_backend(args.backend), args.images, args.concurrency,
+                                    args.batch_size, width, height)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
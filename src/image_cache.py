@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+class ImageArtifactCache:
+    """Size-capped directory of rendered images keyed by prompt and generation parameters
+
+    Files are named by their key, so any process can find them; the least recently used
+    files are deleted once the directory grows past max_bytes. Recency survives restarts
+    through file mtimes, which are bumped on every hit.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (path, size), least recently used first
+        self.total_bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'uncacheable': 0, 'evictions': 0, 'evicted_bytes': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        """Index the files already in the cache directory, oldest use first"""
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, os.path.splitext(filename)[0], path, stat.st_size))
+
+        with self.lock:
+            for _, key, path, size in sorted(files):
+                self.entries[key] = (path, size)
+                self.total_bytes += size
+
+    @staticmethod
+    def key(prompt, params):
+        """Cache key for a prompt (whitespace-insensitive) and its generation parameters"""
+        payload = json.dumps([' '.join(prompt.split()), params], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, extension=None):
+        """Get the cached path for a key and mark it most recently used, or None
+
+        With extension, a file another process cached under the key since load() is adopted.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and not os.path.exists(entry[0]):
+                # Evicted by another process sharing the directory
+                self.entries.pop(key)
+                self.total_bytes -= entry[1]
+                entry = None
+
+            if not entry and extension:
+                path = os.path.join(self.cache_dir, f"{key}.{extension}")
+                try:
+                    entry = (path, os.path.getsize(path))
+                except OSError:
+                    entry = None
+                else:
+                    self.entries[key] = entry
+                    self.total_bytes += entry[1]
+                    self.evict()
+
+            if not entry:
+                self.stats['misses'] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+
+        try:
+            os.utime(entry[0])
+        except OSError:
+            pass
+        return entry[0]
+
+    def put(self, key, source_path):
+        """Move a rendered file into the cache under key; returns its cached path"""
+        extension = os.path.splitext(source_path)[1]
+        path = os.path.join(self.cache_dir, f"{key}{extension}")
+        os.replace(source_path, path)
+        size = os.path.getsize(path)
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.total_bytes -= previous[1]
+            self.entries[key] = (path, size)
+            self.total_bytes += size
+            self.evict()
+
+        return path
+
+    def evict(self):
+        # Caller holds the lock; the newest entry is always kept
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (path, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.stats['evictions'] += 1
+            self.stats['evicted_bytes'] += size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_or_render(self, prompt, params, render):
+        """Return (path, cached) for a prompt, calling render(output_path) only on a miss
+
+        path is None if render did not produce a file.
+        """
+        key = self.key(prompt, params)
+        extension = params.get('format', 'png')
+        path = self.get(key, extension)
+        if path:
+            return path, True
+
+        temp_path = os.path.join(self.cache_dir, f".{key}.{os.getpid()}.{threading.get_ident()}.{extension}")
+        try:
+            render(temp_path)
+            if not os.path.exists(temp_path):
+                with self.lock:
+                    self.stats['uncacheable'] += 1
+                return None, False
+            return self.put(key, temp_path), False
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def export(self, path, dest_path):
+        """Give dest_path its own hard link (or copy) of a cached file, so eviction cannot remove it"""
+        temp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                os.link(path, temp_path)
+            except OSError:
+                # Different filesystem, or links unsupported
+                shutil.copy2(path, temp_path)
+            os.replace(temp_path, dest_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return dest_path
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+            stats['total_bytes'] = self.total_bytes
+            stats['max_bytes'] = self.max_bytes
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,244 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'images')
+
+class AssetAtlas:
+    """Brand assets decoded once into memory, with resized copies cached per target box
+
+    Decoding the multi-megabyte source PNGs dominates a naive render; here each file is
+    decoded at most once per process and each (asset, box) is resampled at most once.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, max_sized=256):
+        self.assets_dir = assets_dir
+        self.max_sized = max_sized
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.sized = OrderedDict()
+        self.stats = {'decodes': 0, 'resizes': 0, 'hits': 0}
+
+    def source(self, name):
+        with self.lock:
+            image = self.sources.get(name)
+        if image is None:
+            with Image.open(os.path.join(self.assets_dir, name)) as asset:
+                image = asset.convert('RGBA')
+            with self.lock:
+                image = self.sources.setdefault(name, image)
+                self.stats['decodes'] += 1
+        return image
+
+    def get(self, name, box):
+        """Get an asset scaled to fit inside box (width, height), keeping its aspect ratio"""
+        key = (name, box)
+        with self.lock:
+            image = self.sized.get(key)
+            if image is not None:
+                self.sized.move_to_end(key)
+                self.stats['hits'] += 1
+                return image
+
+        image = self.source(name).copy()
+        image.thumbnail(box, Image.Resampling.LANCZOS)
+        with self.lock:
+            self.sized[key] = image
+            self.stats['resizes'] += 1
+            while len(self.sized) > self.max_sized:
+                self.sized.popitem(last=False)
+        return image
+
+    def packaging(self, product_id):
+        """Asset name of a product's packaging shot (vitalflow_energy -> vitalflow_packaging_energy.png)"""
+        name = f"vitalflow_packaging_{product_id.split('_')[-1]}.png"
+        if os.path.exists(os.path.join(self.assets_dir, name)):
+            return name
+        return 'vitalflow_logo_primary.png'
+
+class TextRasterCache:
+    """Fonts loaded once per size and text rasterized once into reusable alpha masks"""
+
+    def __init__(self, max_masks=2048):
+        self.max_masks = max_masks
+        self.lock = threading.Lock()
+        self.fonts = {}
+        self.masks = OrderedDict()
+        self.stats = {'rasterized': 0, 'hits': 0}
+
+    def font(self, size):
+        with self.lock:
+            if size not in self.fonts:
+                self.fonts[size] = ImageFont.load_default(size=size)
+            return self.fonts[size]
+
+    def mask(self, text, size, stroke=0):
+        """Get an 'L' mask of the rendered text"""
+        key = (text, size, stroke)
+        with self.lock:
+            mask = self.masks.get(key)
+            if mask is not None:
+                self.masks.move_to_end(key)
+                self.stats['hits'] += 1
+                return mask
+
+        font = self.font(size)
+        left, top, right, bottom = font.getbbox(text, stroke_width=stroke)
+        mask = Image.new('L', (max(1, right - left), max(1, bottom - top)))
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255, stroke_width=stroke, stroke_fill=255)
+
+        with self.lock:
+            self.masks[key] = mask
+            self.stats['rasterized'] += 1
+            while len(self.masks) > self.max_masks:
+                self.masks.popitem(last=False)
+        return mask
+
+class Compositor:
+    """Layout engine that renders template images by compositing cached brand assets and text
+
+    Layouts: thumbnail, myth_busting (myth vs fact split) and transformation (before/after
+    split). Backgrounds, scaled assets and text masks are all cached, so a render is a
+    handful of pastes onto a copied background.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR):
+        self.atlas = AssetAtlas(assets_dir)
+        self.text = TextRasterCache()
+        self.backgrounds = {}
+        self.lock = threading.Lock()
+        self.layouts = {
+            'thumbnail': self.layout_thumbnail,
+            'myth_busting': self.layout_myth_busting,
+            'transformation': self.layout_transformation
+        }
+
+    def background(self, size, top, bottom, split=False):
+        """Cached background: a vertical gradient, or two flat halves when split"""
+        key = (size, top, bottom, split)
+        with self.lock:
+            image = self.backgrounds.get(key)
+        if image is None:
+            width, height = size
+            if split:
+                image = Image.new('RGB', size, top)
+                image.paste(bottom, (width // 2, 0, width, height))
+            else:
+                mask = Image.linear_gradient('L').resize(size)
+                image = Image.composite(Image.new('RGB', size, bottom), Image.new('RGB', size, top), mask)
+            with self.lock:
+                image = self.backgrounds.setdefault(key, image)
+        return image.copy()
+
+    def paste_asset(self, canvas, name, box, center):
+        asset = self.atlas.get(name, box)
+        canvas.paste(asset, (center[0] - asset.width // 2, center[1] - asset.height // 2), asset)
+
+    def paste_text(self, canvas, text, size, center, color=(255, 255, 255), shadow=(0, 0, 0)):
+        if shadow:
+            outline = self.text.mask(text, size, stroke=max(1, size // 12))
+            canvas.paste(shadow, (center[0] - outline.width // 2, center[1] - outline.height // 2), outline)
+        mask = self.text.mask(text, size)
+        canvas.paste(color, (center[0] - mask.width // 2, center[1] - mask.height // 2), mask)
+
+    def layout_thumbnail(self, request, size):
+        width, height = size
+        canvas = self.background(size, (255, 235, 59), (255, 152, 0))
+        self.paste_asset(canvas, self.atlas.packaging(request.get('product_id', '')),
+                         (width * 4 // 5, height * 11 // 20), (width // 2, height * 11 // 20))
+        self.paste_asset(canvas, 'vitalflow_logo_primary.png', (width // 4, height // 10), (width // 2, height // 12))
+        headline = request.get('headline') or request.get('product_name', '').upper()
+        self.paste_text(canvas, headline, max(12, width // 11), (width // 2, height * 5 // 6))
+        self.paste_text(canvas, 'WATCH THIS', max(10, width // 16), (width // 2, height * 11 // 12), color=(255, 235, 59))
+        return canvas
+
+    def layout_myth_busting(self, request, size):
+        width, height = size
+        canvas = self.background(size, (229, 57, 53), (67, 160, 71), split=True)
+        draw = ImageDraw.Draw(canvas)
+        label_size = max(12, width // 9)
+        self.paste_text(canvas, 'MYTH', label_size, (width // 4, height // 8))
+        self.paste_text(canvas, 'FACT', label_size, (width * 3 // 4, height // 8))
+
+        # Cross over the myth half, check mark over the fact half
+        stroke = max(2, width // 60)
+        mark = width // 10
+        cx, cy = width // 4, height // 4
+        draw.line((cx - mark, cy - mark, cx + mark, cy + mark), fill='white', width=stroke)
+        draw.line((cx - mark, cy + mark, cx + mark, cy - mark), fill='white', width=stroke)
+        cx = width * 3 // 4
+        draw.line((cx - mark, cy, cx - mark // 3, cy + mark, cx + mark, cy - mark), fill='white', width=stroke)
+
+        self.paste_asset(canvas, self.atlas.packaging(request.get('product_id', '')),
+                         (width * 3 // 5, height // 2), (width // 2, height * 3 // 5))
+        self.paste_text(canvas, request.get('product_name', ''), max(10, width // 18), (width // 2, height * 11 // 12))
+        return canvas
+
+    def layout_transformation(self, request, size):
+        width, height = size
+        canvas = self.background(size, (97, 97, 97), (255, 213, 79), split=True)
+        label_size = max(12, width // 10)
+        self.paste_text(canvas, 'BEFORE', label_size, (width // 4, height // 8))
+        self.paste_text(canvas, 'AFTER', label_size, (width * 3 // 4, height // 8))
+
+        # Product on the "after" side with the timeline across the split
+        self.paste_asset(canvas, self.atlas.packaging(request.get('product_id', '')),
+                         (width * 9 // 20, height // 2), (width * 3 // 4, height // 2))
+        self.paste_text(canvas, '30 DAYS  →', max(10, width // 14), (width // 2, height * 4 // 5))
+        self.paste_asset(canvas, 'vitalflow_logo_primary.png', (width // 4, height // 10), (width // 4, height // 2))
+        return canvas
+
+    def compose(self, request):
+        """Render a request's layout into an RGB image"""
+        layout = self.layouts[request['image_type']]
+        return layout(request, (request['width'], request['height']))
+
+    def render(self, request, output_path):
+        image = self.compose(request)
+        image_format = request.get('format', 'png').upper()
+        if image_format in ('JPEG', 'JPG'):
+            image.save(output_path, 'JPEG', quality=90)
+        elif image_format == 'PNG':
+            # Flat compositions compress well even at the fastest level
+            image.save(output_path, 'PNG', compress_level=1)
+        else:
+            image.save(output_path, image_format)
+
+    def get_stats(self):
+        with self.atlas.lock, self.text.lock:
+            return {
+                'atlas': dict(self.atlas.stats, sized_entries=len(self.atlas.sized)),
+                'text': dict(self.text.stats, masks=len(self.text.masks)),
+                'backgrounds': len(self.backgrounds)
+            }
+
+def benchmark_compositor(compositor=None, renders=300, width=1080, height=1920, image_format=None):
+    """Render every layout repeatedly; returns renders/sec per layout (compose only, or with encoding)"""
+    compositor = compositor or Compositor()
+    results = {}
+
+    for layout in compositor.layouts:
+        requests = [{
+            'image_type': layout,
+            'product_id': 'vitalflow_energy' if i % 2 else 'vitalflow_calm',
+            'product_name': 'VitalFlow Energy' if i % 2 else 'VitalFlow Calm',
+            'width': width,
+            'height': height
+        } for i in range(renders)]
+
+        # Warm the atlas and text caches like a long-running generator would be
+        compositor.compose(requests[0])
+        compositor.compose(requests[1])
+
+        started = time.perf_counter()
+        for request in requests:
+            image = compositor.compose(request)
+            if image_format:
+                with open(os.devnull, 'wb') as sink:
+                    image.save(sink, image_format)
+        results[layout] = round(renders / (time.perf_counter() - started), 1)
+
+    return results
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from PIL import Image
+
+from image_cache import ImageArtifactCache
+
+# Named renditions per consumer; each fits inside size, keeping the aspect ratio
+RENDITION_PRESETS = {
+    'feed_thumbnail': {'width': 360, 'height': 640, 'format': 'webp', 'quality': 75},
+    'dashboard': {'width': 270, 'height': 480, 'format': 'jpeg', 'quality': 80},
+    'shop_listing': {'width': 800, 'height': 800, 'format': 'webp', 'quality': 88}
+}
+
+# Pillow format name, MIME type and encoder options per rendition format
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'optimize': True, 'progressive': True})
+}
+
+class RenditionStore:
+    """Resized, re-encoded copies of generated images, made on first request and cached on disk
+
+    A rendition is keyed by the source file's content hash plus the preset's size, format
+    and quality, so a regenerated source never serves a stale derivative. Files live in a
+    size-capped ImageArtifactCache shared by every process.
+    """
+
+    def __init__(self, cache_dir, presets=None, max_bytes=256 * 1024 * 1024):
+        self.cache = ImageArtifactCache(cache_dir, max_bytes=max_bytes)
+        self.presets = dict(presets or RENDITION_PRESETS)
+        self.lock = threading.Lock()
+        self.source_hashes = {}  # path -> (mtime_ns, size, sha256)
+        self.stats = {name: {'generated': 0, 'hits': 0, 'saved_bytes': 0, 'render_ms': 0.0} for name in self.presets}
+
+    def source_hash(self, path):
+        """Content hash of a source image, rehashed only when the file changes"""
+        stat = os.stat(path)
+        with self.lock:
+            known = self.source_hashes.get(path)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with self.lock:
+            self.source_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def render(self, source_path, output_path, preset):
+        box = (preset['width'], preset['height'])
+        image_format, _, options = RENDITION_FORMATS[preset['format']]
+
+        with Image.open(source_path) as image:
+            # JPEG sources decode straight at a reduced DCT scale; a no-op for other formats
+            image.draft('RGB', box)
+            # Cheap integer box reduction first, so LANCZOS only resamples the last step
+            factor = min(image.width // box[0], image.height // box[1])
+            if factor >= 2:
+                image = image.reduce(factor)
+            else:
+                image.load()
+
+        if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        image.thumbnail(box, Image.Resampling.LANCZOS)
+        image.save(output_path, image_format, quality=preset['quality'], **options)
+
+    def get(self, source_path, preset_name):
+        """Return (path, report) for a source image's rendition, rendering it on first request
+
+        report holds the rendition's size, the bytes it saves over the source and the latency
+        of this call.
+        """
+        if preset_name not in self.presets:
+            raise ValueError(f"Unknown rendition preset: {preset_name}")
+        preset = self.presets[preset_name]
+        started = time.perf_counter()
+
+        path, cached = self.cache.get_or_render(
+            self.source_hash(source_path), preset, lambda output_path: self.render(source_path, output_path, preset)
+        )
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        source_bytes = os.path.getsize(source_path)
+        rendition_bytes = os.path.getsize(path)
+
+        with self.lock:
+            stats = self.stats[preset_name]
+            if cached:
+                stats['hits'] += 1
+            else:
+                stats['generated'] += 1
+                stats['saved_bytes'] += source_bytes - rendition_bytes
+                stats['render_ms'] += latency_ms
+
+        return path, {
+            'preset': preset_name,
+            'format': preset['format'],
+            'mimetype': RENDITION_FORMATS[preset['format']][1],
+            'cached': cached,
+            'bytes': rendition_bytes,
+            'source_bytes': source_bytes,
+            'saved_bytes': source_bytes - rendition_bytes,
+            'latency_ms': latency_ms
+        }
+
+    def get_stats(self):
+        with self.lock:
+            presets = {}
+            for name, stats in self.stats.items():
+                presets[name] = dict(stats, render_ms=round(stats['render_ms'], 1))
+                if stats['generated']:
+                    presets[name]['mean_render_ms'] = round(stats['render_ms'] / stats['generated'], 1)
+        return {'presets': presets, 'cache': self.cache.get_stats()}
+
+def benchmark_renditions(source_paths, presets=None):
+    """Render every preset of every source cold, then again warm; returns per-preset bytes and latency"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = RenditionStore(cache_dir, presets)
+        results = {}
+
+        for preset_name in store.presets:
+            cold = [store.get(path, preset_name)[1] for path in source_paths]
+            warm = [store.get(path, preset_name)[1] for path in source_paths]
+            results[preset_name] = {
+                'renditions': len(cold),
+                'avg_kb': round(sum(report['bytes'] for report in cold) / len(cold) / 1024, 1),
+                'avg_source_kb': round(sum(report['source_bytes'] for report in cold) / len(cold) / 1024, 1),
+                'saved_kb': round(sum(report['saved_bytes'] for report in cold) / 1024, 1),
+                'cold_ms': round(sum(report['latency_ms'] for report in cold) / len(cold), 1),
+                'warm_ms': round(sum(report['latency_ms'] for report in warm) / len(warm), 1)
+            }
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='VitalFlow Image Rendition Benchmark')
+    parser.add_argument('sources', nargs='+', help='Source images to derive renditions from')
+    parser.add_argument('--preset', '-p', action='append', choices=sorted(RENDITION_PRESETS),
+                        help='Preset to benchmark; repeatable (default: all)')
+
+    args = parser.parse_args()
+    presets = {name: RENDITION_PRESETS[name] for name in args.preset} if args.preset else None
+
+    print(json.dumps(benchmark_renditions(args.sources, presets), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,337 @@
+import base64
 import json
 import os
 from datetime import datetime, timedelta
-import schedule
+import heapq
+import itertools
 import time
 import threading
-from flask import Flask, request, jsonify
+import uuid
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 import requests
+from content_index import ContentIndex
+from content_store import TransitionJournal, atomic_write_json
+from image_renditions import RenditionStore
+
+class PostingScheduler:
+    """Timer-heap scheduler that sleeps until the next due job and tracks firing lag"""
+    
+    def __init__(self):
+        self.jobs = []  # heap of (fire_at, seq, time_of_day, callback)
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.stats = {
+            'runs': 0,
+            'last_lag_seconds': None,
+            'max_lag_seconds': 0.0,
+            'total_lag_seconds': 0.0
+        }
+    
+    def next_fire_time(self, time_of_day, after=None):
+        """Get the next datetime at which a daily HH:MM job is due"""
+        after = after or datetime.now()
+        hour, minute = map(int, time_of_day.split(':'))
+        fire_at = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if fire_at <= after:
+            fire_at += timedelta(days=1)
+        return fire_at
+    
+    def set_daily_jobs(self, times, callback):
+        """Replace this scheduler's jobs with one daily job per HH:MM time"""
+        jobs = []
+        for time_of_day in times:
+            fire_at = self.next_fire_time(time_of_day)
+            heapq.heappush(jobs, (fire_at.timestamp(), next(self.sequence), time_of_day, callback))
+        
+        with self.condition:
+            self.jobs = jobs
+            # Wake the loop so it re-arms its timer for the new earliest job
+            self.condition.notify()
+    
+    def start(self):
+        """Start the scheduler thread"""
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop the scheduler thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+    
+    def run(self):
+        """Sleep until the earliest job is due, run it and re-arm it for the next day"""
+        while True:
+            with self.condition:
+                while self.running and (not self.jobs or self.jobs[0][0] > time.time()):
+                    timeout = self.jobs[0][0] - time.time() if self.jobs else None
+                    self.condition.wait(timeout)
+                
+                if not self.running:
+                    return
+                
+                fire_at, _, time_of_day, callback = heapq.heappop(self.jobs)
+                next_fire = self.next_fire_time(time_of_day, datetime.fromtimestamp(fire_at))
+                heapq.heappush(self.jobs, (next_fire.timestamp(), next(self.sequence), time_of_day, callback))
+            
+            self.record_lag(time.time() - fire_at)
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Scheduled job failed: {e}")
+    
+    def record_lag(self, lag):
+        """Record how late a job fired relative to its due time"""
+        with self.condition:
+            self.stats['runs'] += 1
+            self.stats['last_lag_seconds'] = round(lag, 3)
+            self.stats['max_lag_seconds'] = round(max(self.stats['max_lag_seconds'], lag), 3)
+            self.stats['total_lag_seconds'] += lag
+    
+    def get_stats(self):
+        """Get scheduling lag metrics and the upcoming fire times"""
+        with self.condition:
+            stats = dict(self.stats)
+            upcoming = sorted(job[0] for job in self.jobs)
+        
+        total_lag = stats.pop('total_lag_seconds')
+        stats['avg_lag_seconds'] = round(total_lag / stats['runs'], 3) if stats['runs'] else 0
+        stats['running'] = self.running
+        stats['next_runs'] = [datetime.fromtimestamp(fire_at).isoformat() for fire_at in upcoming]
+        return stats
+
+class PostDispatcher:
+    """Bounded worker pool that runs immediate posts off the request thread"""
+    
+    def __init__(self, automation, max_workers=4, max_pending=100, max_finished_jobs=1000):
+        self.automation = automation
+        self.max_pending = max_pending
+        self.max_finished_jobs = max_finished_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tiktok-post')
+        self.jobs = OrderedDict()
+        self.active_by_content = {}
+        self.lock = threading.Lock()
+    
+    def submit(self, content_id):
+        """Enqueue a post; returns (job, error) where error is None on success"""
+        with self.lock:
+            # Posting the same package twice concurrently would double-post it
+            if content_id in self.active_by_content:
+                return dict(self.jobs[self.active_by_content[content_id]]), None
+            
+            pending = sum(1 for job in self.jobs.values() if job['status'] in ('queued', 'running'))
+            if pending >= self.max_pending:
+                return None, 'Post queue is full, try again later'
+            
+            job = {
+                'id': uuid.uuid4().hex,
+                'content_id': content_id,
+                'status': 'queued',
+                'progress': 'queued',
+                'message': None,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None
+            }
+            self.jobs[job['id']] = job
+            self.active_by_content[content_id] = job['id']
+            self.prune_finished_jobs()
+        
+        self.executor.submit(self.run_job, job['id'])
+        return dict(job), None
+    
+    def run_job(self, job_id):
+        """Worker: post the package and record the outcome on the job"""
+        self.update(job_id, status='running', progress='posting', started_at=datetime.now().isoformat())
+        content_id = self.jobs[job_id]['content_id']
+        
+        try:
+            success, message = self.automation.schedule_immediate_post(
+                content_id, progress=lambda stage: self.update(job_id, progress=stage))
+        except Exception as e:
+            success, message = False, f"Error: {e}"
+        
+        self.update(job_id, status='succeeded' if success else 'failed', progress='done',
+                    message=message, finished_at=datetime.now().isoformat())
+        with self.lock:
+            self.active_by_content.pop(content_id, None)
+    
+    def update(self, job_id, **fields):
+        """Update fields on a job"""
+        with self.lock:
+            self.jobs[job_id].update(fields)
+    
+    def get(self, job_id):
+        """Get a copy of a job's current state"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def prune_finished_jobs(self):
+        """Drop the oldest finished jobs beyond the retention limit (lock held)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] in ('succeeded', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+class AccountRateLimiter:
+    """Per-account token buckets plus a daily post quota"""
+    
+    def __init__(self, accounts):
+        self.lock = threading.Lock()
+        self.accounts = {}
+        self.configure(accounts)
+    
+    def configure(self, accounts):
+        """(Re)load account limits, keeping usage for accounts that still exist"""
+        with self.lock:
+            # Built aside so a malformed account leaves the current limits in place
+            configured = {}
+            for account in accounts:
+                state = self.accounts.get(account['id'], {})
+                configured[account['id']] = {
+                    'config': account,
+                    'tokens': min(state.get('tokens', account['burst']), account['burst']),
+                    'refilled_at': state.get('refilled_at', time.time()),
+                    'day': state.get('day', datetime.now().strftime('%Y-%m-%d')),
+                    'posts_today': state.get('posts_today', 0)
+                }
+            self.accounts = configured
+    
+    def try_acquire(self, account_id):
+        """Take a token and a unit of daily quota for one post, if both are available"""
+        with self.lock:
+            state = self.accounts[account_id]
+            config = state['config']
+            now = time.time()
+            
+            today = datetime.now().strftime('%Y-%m-%d')
+            if state['day'] != today:
+                state['day'], state['posts_today'] = today, 0
+            
+            refill = (now - state['refilled_at']) * config['posts_per_hour'] / 3600
+            state['tokens'] = min(config['burst'], state['tokens'] + refill)
+            state['refilled_at'] = now
+            
+            if state['tokens'] < 1 or state['posts_today'] >= config['daily_quota']:
+                return False
+            
+            state['tokens'] -= 1
+            state['posts_today'] += 1
+            return True
+    
+    def get_stats(self):
+        """Get remaining tokens and quota per account"""
+        with self.lock:
+            return {
+                account_id: {
+                    'tokens': round(state['tokens'], 2),
+                    'posts_today': state['posts_today'],
+                    'daily_quota': state['config']['daily_quota']
+                } for account_id, state in self.accounts.items()
+            }
+
+class PublishingPipeline:
+    """Publishes a batch of ready packages concurrently, one worker per account"""
+    
+    def __init__(self, automation, accounts, max_attempts=5, base_backoff_seconds=300):
+        self.automation = automation
+        self.accounts = accounts
+        self.limiter = AccountRateLimiter(accounts)
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+    
+    def publish_batch(self, max_items=10):
+        """Publish up to max_items due packages across all accounts"""
+        work = queue.Queue()
+        for content_package in self.automation.get_ready_content(limit=max_items, due_only=True):
+            work.put(content_package)
+        
+        results = []
+        if work.empty():
+            return results
+        
+        with ThreadPoolExecutor(max_workers=len(self.accounts), thread_name_prefix='tiktok-publish') as pool:
+            for account in self.accounts:
+                pool.submit(self.account_worker, account, work, results)
+        
+        return results
+    
+    def account_worker(self, account, work, results):
+        """Post queued packages on one account until the queue or its limits run out"""
+        while True:
+            try:
+                content_package = work.get_nowait()
+            except queue.Empty:
+                return
+            
+            # Claim before spending rate limit, so a package taken elsewhere costs no quota
+            content_id = content_package['id']
+            if not self.automation.claim(content_id):
+                results.append({'content_id': content_id, 'account_id': account['id'], 'status': 'skipped'})
+                continue
+            
+            # The batch was listed before the claim; another path may have posted it since
+            if not self.automation.is_ready(content_id):
+                self.automation.release(content_id)
+                results.append({'content_id': content_id, 'account_id': account['id'], 'status': 'skipped'})
+                continue
+            
+            if not self.limiter.try_acquire(account['id']):
+                # Leave the package for another account (or the next batch)
+                self.automation.release(content_id)
+                work.put(content_package)
+                return
+            
+            results.append(self.publish(account, content_package))
+    
+    def publish(self, account, content_package):
+        """Post one package claimed by the caller and either mark it posted or schedule a retry"""
+        content_id = content_package['id']
+        try:
+            if self.automation.publish_package(content_package, account=account):
+                return {'content_id': content_id, 'account_id': account['id'], 'status': 'posted'}
+            
+            return self.schedule_retry(account, content_id)
+        finally:
+            self.automation.release(content_id)
+    
+    def schedule_retry(self, account, content_id):
+        """Back off exponentially, giving up after max_attempts"""
+        attempts = self.automation.content_index.record_failure(content_id)
+        
+        if attempts >= self.max_attempts:
+            self.automation.content_index.update_status(content_id, 'failed')
+            print(f"🛑 Giving up on {content_id} after {attempts} attempts")
+            return {'content_id': content_id, 'account_id': account['id'], 'status': 'failed', 'attempts': attempts}
+        
+        retry_at = datetime.now() + timedelta(seconds=self.base_backoff_seconds * 2 ** (attempts - 1))
+        self.automation.content_index.defer(content_id, retry_at.isoformat())
+        return {'content_id': content_id, 'account_id': account['id'], 'status': 'retry_scheduled',
+                'attempts': attempts, 'retry_at': retry_at.isoformat()}
+
+# Package fields the content index stores, so listings of only these skip the package files
+INDEX_FIELDS = {'id', 'status', 'generated_at'}
+
+def encode_cursor(entry):
+    """Opaque cursor for the listing position just after an index entry"""
+    position = json.dumps([entry['generated_at'], entry['id']])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(generated_at, content_id) position of a cursor; raises ValueError if it is malformed"""
+    position = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    if not (isinstance(position, list) and len(position) == 2 and all(isinstance(value, str) for value in position)):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(position)
 
 class TikTokPostingAutomation:
     def __init__(self):
@@ -15,9 +341,21 @@ class TikTokPostingAutomation:
         self.posting_schedule = {
             'times': ['08:00', '12:00', '18:00'],  # Optimal posting times
             'frequency': 'daily',
-            'max_posts_per_day': 3
+            'batch_size': 10  # Max packages published per scheduled run, across all accounts
         }
+        # Each account is rate limited independently (token bucket + daily quota)
+        self.accounts = [
+            {'id': 'default', 'daily_quota': 3, 'posts_per_hour': 1, 'burst': 1}
+        ]
+        self.in_flight = set()
+        self.in_flight_lock = threading.Lock()
         self.ensure_directories()
+        self.content_index = ContentIndex(self.content_dir, posted_dir=self.posted_content_dir)
+        self.journal = TransitionJournal(os.path.join(self.content_dir, 'post_transitions.journal'))
+        self.renditions = RenditionStore(os.path.join(self.content_dir, 'images', 'renditions'))
+        self.recover_transitions()
+        self.dispatcher = PostDispatcher(self)
+        self.pipeline = PublishingPipeline(self, self.accounts)
         self.setup_scheduler()
     
     def ensure_directories(self):
@@ -27,75 +365,115 @@ class TikTokPostingAutomation:
     
     def setup_scheduler(self):
         """Setup the posting scheduler"""
-        for post_time in self.posting_schedule['times']:
-            schedule.every().day.at(post_time).do(self.automated_post)
+        self.scheduler = PostingScheduler()
+        self.scheduler.set_daily_jobs(self.posting_schedule['times'], self.automated_post)
         
         # Start scheduler in background thread
-        scheduler_thread = threading.Thread(target=self.run_scheduler, daemon=True)
-        scheduler_thread.start()
+        if self.scheduling_enabled:
+            self.scheduler.start()
         print(f"📅 Scheduler started with posting times: {self.posting_schedule['times']}")
     
-    def run_scheduler(self):
-        """Run the scheduler continuously"""
-        while self.scheduling_enabled:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-    
     def automated_post(self):
-        """Automatically post content to TikTok"""
+        """Automatically publish a batch of ready content across accounts"""
         try:
             print("🚀 Starting automated TikTok posting...")
             
-            # Get ready content
-            ready_content = self.get_ready_content()
+            results = self.pipeline.publish_batch(self.posting_schedule.get('batch_size', 10))
             
-            if not ready_content:
+            if not results:
                 print("📭 No content ready for posting")
-                return
-            
-            # Select content to post
-            content_to_post = ready_content[0]  # Get the oldest ready content
+                return results
             
-            # Post to TikTok
-            success = self.post_to_tiktok(content_to_post)
+            for result in results:
+                if result['status'] == 'posted':
+                    print(f"✅ Successfully posted content: {result['content_id']} ({result['account_id']})")
+                else:
+                    print(f"❌ Failed to post content: {result['content_id']} ({result['status']})")
             
-            if success:
-                # Move content to posted directory
-                self.mark_content_as_posted(content_to_post)
-                print(f"✅ Successfully posted content: {content_to_post['id']}")
-            else:
-                print(f"❌ Failed to post content: {content_to_post['id']}")
+            return results
                 
         except Exception as e:
             print(f"❌ Error in automated posting: {e}")
+            return []
+    
+    def claim(self, content_id):
+        """Reserve a package for posting so concurrent paths cannot post it twice"""
+        with self.in_flight_lock:
+            if content_id in self.in_flight:
+                return False
+            self.in_flight.add(content_id)
+            return True
+    
+    def release(self, content_id):
+        """Release a package reserved with claim()"""
+        with self.in_flight_lock:
+            self.in_flight.discard(content_id)
     
-    def get_ready_content(self):
-        """Get content that's ready for posting"""
+    def is_ready(self, content_id):
+        """Whether a package is still indexed as ready for posting and its file still exists"""
+        entry = self.content_index.get(content_id)
+        return bool(entry) and entry['status'] == 'ready_for_posting' and os.path.exists(entry['path'])
+    
+    def get_ready_content(self, limit=None, offset=0, due_only=False):
+        """Get content that's ready for posting (oldest first)"""
         ready_content = []
         
         try:
-            for filename in os.listdir(self.content_dir):
-                if filename.startswith('content_package_') and filename.endswith('.json'):
-                    filepath = os.path.join(self.content_dir, filename)
-                    
-                    with open(filepath, 'r') as f:
-                        content_package = json.load(f)
-                    
-                    if content_package.get('status') == 'ready_for_posting':
-                        ready_content.append(content_package)
-            
-            # Sort by creation time (oldest first)
-            ready_content.sort(key=lambda x: x.get('generated_at', ''))
+            entries = self.content_index.list_entries('ready_for_posting', limit=limit, offset=offset,
+                                                      due_only=due_only)
+            ready_content.extend(self.iter_ready_content(entries))
             
         except Exception as e:
             print(f"Error getting ready content: {e}")
         
         return ready_content
     
-    def post_to_tiktok(self, content_package):
+    def iter_ready_content(self, entries, fields=None):
+        """Yield the ready packages behind index entries, reduced to the given top-level fields
+        
+        Fields the index already holds (id, status, generated_at) are answered without
+        opening the package files.
+        """
+        if fields and set(fields) <= INDEX_FIELDS:
+            for entry in entries:
+                yield {field: entry[field] for field in fields}
+            return
+        
+        for entry in entries:
+            content_package = self.load_content_package(entry)
+            if content_package and content_package.get('status') == 'ready_for_posting':
+                if fields:
+                    content_package = {field: content_package[field] for field in fields if field in content_package}
+                yield content_package
+    
+    def load_content_package(self, entry):
+        """Load the package file behind an index entry, dropping stale entries"""
+        try:
+            with open(entry['path'], 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            self.content_index.remove(entry['id'])
+        except ValueError as e:
+            print(f"Error reading content package {entry['id']}: {e}")
+        return None
+    
+    def get_image_rendition(self, content_id, image_type, preset):
+        """Get (path, report) for a package image's rendition, or None if the package or image is gone"""
+        entry = self.content_index.get(content_id)
+        content_package = self.load_content_package(entry) if entry else None
+        if not content_package:
+            return None
+        
+        for image in content_package.get('images', []):
+            if image.get('type') == image_type and os.path.exists(image.get('path', '')):
+                return self.renditions.get(image['path'], preset)
+        return None
+    
+    def post_to_tiktok(self, content_package, account=None):
         """Post content to TikTok (simulated for now)"""
         try:
-            print(f"📱 Posting to TikTok: {content_package['id']}")
+            account_id = account['id'] if account else 'default'
+            print(f"📱 Posting to TikTok: {content_package['id']} ({account_id})")
             
             # In a real implementation, this would use TikTok's API
             # For now, we'll simulate the posting process
@@ -105,7 +483,9 @@ class TikTokPostingAutomation:
                 'hashtags': content_package['content']['hashtags'],
                 'images': content_package.get('images', []),
                 'product_id': content_package['product']['id'],
-                'template_type': content_package['template']['type']
+                'template_type': content_package['template']['type'],
+                'account_id': account_id,
+                'idempotency_key': content_package['id']
             }
             
             # Simulate API call delay
@@ -141,6 +521,24 @@ class TikTokPostingAutomation:
         
         return description
     
+    def publish_package(self, content_package, account=None, progress=None):
+        """Post a package and durably record each step of its transition to posted"""
+        content_id = content_package['id']
+        account_id = account['id'] if account else None
+        
+        self.journal.append(content_id, 'posting', account_id=account_id)
+        
+        if not self.post_to_tiktok(content_package, account=account):
+            self.journal.append(content_id, 'failed')
+            return False
+        
+        if progress:
+            progress('marking_posted')
+        if account_id:
+            content_package['account_id'] = account_id
+        self.mark_content_as_posted(content_package)
+        return True
+    
     def mark_content_as_posted(self, content_package):
         """Mark content as posted and move to posted directory"""
         try:
@@ -148,39 +546,94 @@ class TikTokPostingAutomation:
             content_package['status'] = 'posted'
             content_package['posted_at'] = datetime.now().isoformat()
             
-            # Save to posted directory
-            posted_filename = f"{self.posted_content_dir}/posted_{content_package['id']}.json"
-            with open(posted_filename, 'w') as f:
-                json.dump(content_package, f, indent=2)
-            
-            # Remove from ready directory
-            original_filename = f"{self.content_dir}/content_package_{content_package['id']}.json"
-            if os.path.exists(original_filename):
-                os.remove(original_filename)
+            # Commit point: once journaled, recovery will finish the move even after a crash
+            self.journal.append(content_package['id'], 'posted', posted_at=content_package['posted_at'],
+                                account_id=content_package.get('account_id'))
+            posted_filename = self.apply_posted(content_package)
+            self.journal.append(content_package['id'], 'done')
+            self.journal.compact()
             
             print(f"📁 Content moved to posted directory: {posted_filename}")
             
         except Exception as e:
             print(f"Error marking content as posted: {e}")
     
-    def schedule_immediate_post(self, content_id):
-        """Schedule an immediate post"""
+    def apply_posted(self, content_package):
+        """Move a package to the posted directory; safe to repeat"""
+        # Save to posted directory
+        posted_filename = f"{self.posted_content_dir}/posted_{content_package['id']}.json"
+        atomic_write_json(posted_filename, content_package)
+        
+        # Remove from ready directory
+        original_filename = f"{self.content_dir}/content_package_{content_package['id']}.json"
+        if os.path.exists(original_filename):
+            os.remove(original_filename)
+        
+        self.content_index.update_status(content_package['id'], 'posted', posted_filename,
+                                         posted_at=content_package['posted_at'])
+        return posted_filename
+    
+    def recover_transitions(self):
+        """Replay unfinished transitions from the journal after a restart"""
+        for content_id, record in self.journal.pending().items():
+            try:
+                if record['state'] == 'posted':
+                    # The upload succeeded; finish moving the package
+                    content_package = None
+                    for path in (f"{self.posted_content_dir}/posted_{content_id}.json",
+                                 f"{self.content_dir}/content_package_{content_id}.json"):
+                        try:
+                            with open(path, 'r') as f:
+                                content_package = json.load(f)
+                            break
+                        except (OSError, ValueError):
+                            continue
+                    
+                    if content_package is None:
+                        print(f"⚠️ Cannot recover {content_id}: package file missing")
+                        continue
+                    
+                    content_package['status'] = 'posted'
+                    content_package['posted_at'] = record.get('posted_at') or content_package.get('posted_at')
+                    if record.get('account_id'):
+                        content_package['account_id'] = record['account_id']
+                    self.apply_posted(content_package)
+                    self.journal.append(content_id, 'done', recovered=True)
+                    print(f"♻️ Recovered posted transition for {content_id}")
+                else:
+                    # Interrupted mid-upload: the package stays queued, and the retry reuses
+                    # the package id as idempotency key so the platform can drop a duplicate
+                    self.journal.append(content_id, 'failed', reason='interrupted')
+                    print(f"♻️ Returned interrupted post {content_id} to the queue")
+            
+            except Exception as e:
+                print(f"Error recovering transition for {content_id}: {e}")
+        
+        self.journal.compact(force=True)
+    
+    def schedule_immediate_post(self, content_id, progress=None):
+        """Post a content package now (runs on a dispatcher worker for /post-now)"""
         try:
             content_file = f"{self.content_dir}/content_package_{content_id}.json"
             
             if not os.path.exists(content_file):
                 return False, "Content not found"
             
-            with open(content_file, 'r') as f:
-                content_package = json.load(f)
-            
-            success = self.post_to_tiktok(content_package)
+            if not self.claim(content_id):
+                return False, "Content is already being posted"
             
-            if success:
-                self.mark_content_as_posted(content_package)
-                return True, "Posted successfully"
-            else:
-                return False, "Posting failed"
+            try:
+                with open(content_file, 'r') as f:
+                    content_package = json.load(f)
+                
+                success = self.publish_package(content_package, progress=progress)
+                
+                if success:
+                    return True, "Posted successfully"
+                else:
+                    return False, "Posting failed"
+            finally:
+                self.release(content_id)
                 
         except Exception as e:
             return False, f"Error: {e}"
@@ -190,7 +643,9 @@ class TikTokPostingAutomation:
         return {
             'schedule': self.posting_schedule,
             'enabled': self.scheduling_enabled,
-            'next_posts': self.get_next_scheduled_posts()
+            'next_posts': self.get_next_scheduled_posts(),
+            'scheduler': self.scheduler.get_stats(),
+            'accounts': self.pipeline.limiter.get_stats()
         }
     
     def get_next_scheduled_posts(self):
@@ -231,14 +686,22 @@ class TikTokPostingAutomation:
     def update_schedule(self, new_schedule):
         """Update posting schedule"""
         try:
-            self.posting_schedule.update(new_schedule)
+            new_schedule = dict(new_schedule)
+            accounts = new_schedule.pop('accounts', None)
+            
+            # Validate the times before changing anything, so a bad update is rejected whole
+            for time_of_day in new_schedule.get('times', self.posting_schedule['times']):
+                self.scheduler.next_fire_time(time_of_day)
             
-            # Clear existing schedule
-            schedule.clear()
+            if accounts is not None:
+                self.pipeline.limiter.configure(accounts)
+                self.accounts = accounts
+                self.pipeline.accounts = accounts
             
-            # Setup new schedule
-            for post_time in self.posting_schedule['times']:
-                schedule.every().day.at(post_time).do(self.automated_post)
+            self.posting_schedule.update(new_schedule)
+            
+            # Replace only this service's jobs and re-arm the timer
+            self.scheduler.set_daily_jobs(self.posting_schedule['times'], self.automated_post)
             
             print(f"📅 Schedule updated: {self.posting_schedule['times']}")
             return True
@@ -250,38 +713,25 @@ class TikTokPostingAutomation:
     def get_posting_analytics(self):
         """Get posting analytics"""
         try:
-            posted_content = []
-            
-            if os.path.exists(self.posted_content_dir):
-                for filename in os.listdir(self.posted_content_dir):
-                    if filename.startswith('posted_') and filename.endswith('.json'):
-                        filepath = os.path.join(self.posted_content_dir, filename)
-                        
-                        with open(filepath, 'r') as f:
-                            content = json.load(f)
-                            posted_content.append(content)
-            
-            # Calculate analytics
-            total_posts = len(posted_content)
-            posts_today = len([c for c in posted_content 
-                             if c.get('posted_at', '').startswith(datetime.now().strftime('%Y-%m-%d'))])
-            
-            template_stats = {}
-            product_stats = {}
-            
-            for content in posted_content:
-                template_type = content.get('template', {}).get('type', 'unknown')
-                product_name = content.get('product', {}).get('name', 'unknown')
-                
-                template_stats[template_type] = template_stats.get(template_type, 0) + 1
-                product_stats[product_name] = product_stats.get(product_name, 0) + 1
+            template_stats = self.content_index.rollup('template')
+            product_stats = self.content_index.rollup('product')
+            
+            # Aggregates come from the index rollups; only the recent posts are read from disk
+            total_posts = sum(template_stats.values())
+            posts_today = self.content_index.rollup_count('day', datetime.now().strftime('%Y-%m-%d'))
+            
+            recent_posts = []
+            for entry in reversed(self.content_index.recent('posted', limit=5)):
+                content = self.load_content_package(entry)
+                if content:
+                    recent_posts.append(content)
             
             return {
                 'total_posts': total_posts,
                 'posts_today': posts_today,
                 'template_distribution': template_stats,
                 'product_distribution': product_stats,
-                'recent_posts': posted_content[-5:] if posted_content else []
+                'recent_posts': recent_posts
             }
             
         except Exception as e:
@@ -317,21 +767,56 @@ def update_schedule():
 
 @app.route('/api/tiktok/post-now', methods=['POST'])
 def post_now():
-    """Post content immediately"""
+    """Queue content for immediate posting; returns 202 with a job id"""
     try:
         data = request.get_json()
         content_id = data.get('content_id')
         
-        success, message = automation.schedule_immediate_post(content_id)
+        if not content_id or not os.path.exists(f"{automation.content_dir}/content_package_{content_id}.json"):
+            return jsonify({'success': False, 'message': 'Content not found'}), 404
+        
+        job, error = automation.dispatcher.submit(content_id)
+        if error:
+            return jsonify({'success': False, 'message': error}), 503
         
         return jsonify({
-            'success': success,
-            'message': message
+            'success': True,
+            'message': 'Post queued',
+            'job_id': job['id'],
+            'status_url': f"/api/tiktok/jobs/{job['id']}"
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/tiktok/publish-batch', methods=['POST'])
+def publish_batch():
+    """Publish a batch of ready content across accounts now"""
+    try:
+        data = request.get_json(silent=True) or {}
+        results = automation.pipeline.publish_batch(data.get('max_items', automation.posting_schedule.get('batch_size', 10)))
+        
+        return jsonify({
+            'success': True,
+            'results': results
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/tiktok/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status of a queued post job"""
+    job = automation.dispatcher.get(job_id)
+    
+    if not job:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
 @app.route('/api/tiktok/analytics', methods=['GET'])
 def get_analytics():
     """Get posting analytics"""
@@ -348,18 +833,86 @@ def get_analytics():
 
 @app.route('/api/tiktok/ready-content', methods=['GET'])
 def get_ready_content():
-    """Get content ready for posting"""
+    """Get content ready for posting, oldest first
+    
+    Pages with ?limit= plus ?cursor= (the next_cursor of the previous page) or ?offset=.
+    ?fields=id,generated_at keeps only those top-level fields. ?stream=true (or Accept:
+    application/x-ndjson) streams the packages as NDJSON as they are read, with the next
+    cursor in the X-Next-Cursor header.
+    """
     try:
-        ready_content = automation.get_ready_content()
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
+        fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()] or None
+        
+        if limit is not None and limit < 1:
+            return jsonify({'success': False, 'message': 'limit must be at least 1'}), 400
+        
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            offset = 0
+        
+        # One row past the page tells whether there is a next one
+        entries = automation.content_index.list_entries('ready_for_posting', limit=None if limit is None else limit + 1,
+                                                        offset=offset, after=after)
+        next_cursor = None
+        if limit is not None and len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(entries[-1])
+        
+        stream = request.args.get('stream') == 'true' or request.accept_mimetypes.best == 'application/x-ndjson'
+        if stream:
+            lines = (json.dumps(package) + '\n' for package in automation.iter_ready_content(entries, fields))
+            response = Response(stream_with_context(lines), mimetype='application/x-ndjson')
+            if next_cursor:
+                response.headers['X-Next-Cursor'] = next_cursor
+            return response
         
         return jsonify({
             'success': True,
-            'content': ready_content
+            'content': list(automation.iter_ready_content(entries, fields)),
+            'next_cursor': next_cursor,
+            'total': automation.content_index.count('ready_for_posting')
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/tiktok/content/<content_id>/images/<image_type>', methods=['GET'])
+def get_image_rendition(content_id, image_type):
+    """Get a package image resized for its consumer (?preset=feed_thumbnail|dashboard|shop_listing)"""
+    preset = request.args.get('preset', 'feed_thumbnail')
+    if preset not in automation.renditions.presets:
+        return jsonify({'success': False, 'message': f"Unknown preset: {preset}"}), 400
+    
+    try:
+        rendition = automation.get_image_rendition(content_id, image_type, preset)
+        if not rendition:
+            return jsonify({'success': False, 'message': 'Image not found'}), 404
+        
+        path, report = rendition
+        response = send_file(path, mimetype=report['mimetype'], max_age=86400)
+        response.headers['X-Rendition-Cached'] = str(report['cached']).lower()
+        response.headers['X-Rendition-Saved-Bytes'] = str(report['saved_bytes'])
+        response.headers['Server-Timing'] = f"rendition;dur={report['latency_ms']}"
+        return response
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/tiktok/renditions/stats', methods=['GET'])
+def get_rendition_stats():
+    """Get rendition cache hits, bytes saved and render latency per preset"""
+    return jsonify({
+        'success': True,
+        'renditions': automation.renditions.get_stats()
+    })
+
 if __name__ == '__main__':
     print("🚀 Starting TikTok Posting Automation System...")
     print("📅 Automated posting enabled")
@@ -1,24 +1,256 @@
 import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sqlite3
 from flask import Flask, request, jsonify, render_template_string
 import requests
 import threading
 import time
+import queue
+import hashlib
+from contextlib import contextmanager
+
+# Dimensions maintained in performance_rollups and the key expression for each
+ROLLUP_DIMENSIONS = [
+    ('all', "'all'"),
+    ('template', "COALESCE({row}.template_type, 'Unknown')"),
+    ('product', "COALESCE({row}.product_name, 'Unknown')"),
+    ('day', "COALESCE(substr({row}.posted_at, 1, 10), 'unknown')")
+]
+
+ROLLUP_METRICS = ['views', 'likes', 'shares', 'comments', 'engagement_rate', 'revenue']
+
+# system_metrics columns summarized into the hourly/daily downsample tables
+DOWNSAMPLED_METRICS = [
+    ('queue', 'content_queue_size'),
+    ('posts', 'posts_today'),
+    ('response', 'api_response_time')
+]
+
+def downsample_table_sql(table):
+    """Build the CREATE TABLE for a min/max/avg downsample table"""
+    columns = ',\n'.join(
+        f'            {prefix}_{stat} REAL' for prefix, _ in DOWNSAMPLED_METRICS for stat in ('min', 'max', 'avg')
+    )
+    return f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket TIMESTAMP PRIMARY KEY,
+            samples INTEGER NOT NULL,
+{columns},
+            error_count INTEGER DEFAULT 0
+        )
+    '''
+
+def downsample_insert_sql(target, source, bucket_format, from_raw):
+    """Build the INSERT that folds source rows older than a cutoff into target buckets"""
+    selects = []
+    for prefix, column in DOWNSAMPLED_METRICS:
+        if from_raw:
+            selects += [f'MIN({column})', f'MAX({column})', f'AVG({column})']
+        else:
+            selects += [f'MIN({prefix}_min)', f'MAX({prefix}_max)', f'SUM({prefix}_avg * samples) / SUM(samples)']
+    
+    samples = 'COUNT(*)' if from_raw else 'SUM(samples)'
+    timestamp = 'timestamp' if from_raw else 'bucket'
+    columns = ', '.join(f'{prefix}_{stat}' for prefix, _ in DOWNSAMPLED_METRICS for stat in ('min', 'max', 'avg'))
+    merges = []
+    for prefix, _ in DOWNSAMPLED_METRICS:
+        merges += [
+            f'{prefix}_min = MIN({prefix}_min, excluded.{prefix}_min)',
+            f'{prefix}_max = MAX({prefix}_max, excluded.{prefix}_max)',
+            f'{prefix}_avg = ({prefix}_avg * samples + excluded.{prefix}_avg * excluded.samples) / (samples + excluded.samples)'
+        ]
+    
+    # WHERE true disambiguates the UPSERT clause from a join constraint
+    return f'''
+        INSERT INTO {target} (bucket, samples, {columns}, error_count)
+        SELECT strftime('{bucket_format}', {timestamp}), {samples}, {', '.join(selects)}, SUM(COALESCE(error_count, 0))
+        FROM {source}
+        WHERE {timestamp} < ?
+        GROUP BY strftime('{bucket_format}', {timestamp})
+        ON CONFLICT(bucket) DO UPDATE SET {', '.join(merges)},
+            error_count = error_count + excluded.error_count,
+            samples = samples + excluded.samples
+    '''
+
+# Versioned schema migrations, applied in order and tracked with PRAGMA user_version
+ANALYTICS_MIGRATIONS = [
+    (1, 'Covering indexes for time-range and top-N dashboard queries', [
+        '''CREATE INDEX IF NOT EXISTS idx_system_metrics_timestamp
+           ON system_metrics (timestamp, content_queue_size, posts_today, api_response_time, system_status)''',
+        '''CREATE INDEX IF NOT EXISTS idx_content_performance_posted_at
+           ON content_performance (posted_at, views, likes, shares, comments)''',
+        '''CREATE INDEX IF NOT EXISTS idx_content_performance_views
+           ON content_performance (views DESC, content_id, product_name, template_type, engagement_rate)'''
+    ]),
+    (2, 'Hourly and daily downsample tables for system_metrics', [
+        downsample_table_sql('system_metrics_hourly'),
+        downsample_table_sql('system_metrics_daily')
+    ])
+]
+
+def rollup_upsert_sql(row, sign, count_posts=True):
+    """Build the UPSERT that applies one content_performance row to every rollup"""
+    columns = ', '.join(f'total_{metric}' for metric in ROLLUP_METRICS)
+    values = ',\n'.join(
+        f"('{dimension}', {key.format(row=row)}, {sign}{1 if count_posts else 0}, "
+        + ', '.join(f"{sign}COALESCE({row}.{metric}, 0)" for metric in ROLLUP_METRICS) + ')'
+        for dimension, key in ROLLUP_DIMENSIONS
+    )
+    updates = ', '.join(f'total_{metric} = total_{metric} + excluded.total_{metric}' for metric in ROLLUP_METRICS)
+    return f'''
+        INSERT INTO performance_rollups (dimension, key, posts, {columns})
+        VALUES {values}
+        ON CONFLICT(dimension, key) DO UPDATE SET posts = posts + excluded.posts, {updates};
+    '''
+
+class AnalyticsConnectionManager:
+    """Persistent WAL-mode SQLite connections: one writer plus a small read pool"""
+    
+    def __init__(self, db_path, read_pool_size=4, cache_size_kb=8192, statement_cache_size=128):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.cache_size_kb = cache_size_kb
+        self.statement_cache_size = statement_cache_size
+        self.write_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            'reads': 0,
+            'writes': 0,
+            'read_wait_seconds': 0.0,
+            'write_wait_seconds': 0.0,
+            'read_connections_in_use': 0,
+            'connections_opened': 0
+        }
+        
+        # The writer is created first so WAL mode is set before any reader attaches
+        self.writer_conn = self.open_connection()
+        self.journal_mode = self.writer_conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.read_pool = queue.Queue()
+        for _ in range(read_pool_size):
+            self.read_pool.put(self.open_connection(read_only=True))
+    
+    def open_connection(self, read_only=False):
+        """Open a tuned connection; sqlite3 reuses prepared statements per connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            timeout=30
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_size_kb}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        if read_only:
+            conn.execute('PRAGMA query_only=ON')
+        
+        with self.stats_lock:
+            self.stats['connections_opened'] += 1
+        return conn
+    
+    @contextmanager
+    def writer(self):
+        """Borrow the writer connection inside a transaction"""
+        start = time.time()
+        with self.write_lock:
+            with self.stats_lock:
+                self.stats['writes'] += 1
+                self.stats['write_wait_seconds'] += time.time() - start
+            with self.writer_conn:
+                yield self.writer_conn
+    
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection from the pool"""
+        start = time.time()
+        conn = self.read_pool.get()
+        with self.stats_lock:
+            self.stats['reads'] += 1
+            self.stats['read_wait_seconds'] += time.time() - start
+            self.stats['read_connections_in_use'] += 1
+        try:
+            yield conn
+        finally:
+            # End any implicit read transaction so the WAL can be checkpointed
+            conn.rollback()
+            with self.stats_lock:
+                self.stats['read_connections_in_use'] -= 1
+            self.read_pool.put(conn)
+    
+    def execute_maintenance(self, statement):
+        """Run a statement that must not be inside a transaction (VACUUM, PRAGMAs)"""
+        with self.write_lock:
+            self.writer_conn.commit()
+            return self.writer_conn.execute(statement).fetchall()
+    
+    def incremental_vacuum(self, pages):
+        """Return up to `pages` free pages to the OS"""
+        with self.write_lock:
+            # executescript steps the pragma to completion; execute() frees only one page.
+            # The checkpoint moves the truncation from the WAL into the main file.
+            self.writer_conn.executescript(f'PRAGMA incremental_vacuum({int(pages)}); PRAGMA wal_checkpoint(TRUNCATE);')
+    
+    def get_stats(self):
+        """Get connection pool statistics"""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        
+        stats['read_pool_size'] = self.read_pool_size
+        stats['read_connections_idle'] = self.read_pool.qsize()
+        stats['avg_read_wait_ms'] = round(stats['read_wait_seconds'] / stats['reads'] * 1000, 3) if stats['reads'] else 0
+        stats['avg_write_wait_ms'] = round(stats['write_wait_seconds'] / stats['writes'] * 1000, 3) if stats['writes'] else 0
+        stats['journal_mode'] = self.journal_mode
+        return stats
 
 class VitalFlowAnalytics:
     def __init__(self):
         self.db_path = "/home/ubuntu/vitalflow_analytics.db"
+        self.db = AnalyticsConnectionManager(self.db_path)
+        self.snapshot = None
+        self.snapshot_lock = threading.Lock()
+        self.retention_policy = {
+            'raw_days': 14,  # Keep five-minute samples this long
+            'hourly_days': 180,  # Then hourly buckets; daily buckets are kept forever
+            'interval_seconds': 3600,  # How often the retention job runs
+            'vacuum_pages': 2000  # Max free pages returned to the OS per run
+        }
+        self.last_retention_run = 0
+        self.last_retention_report = None
         self.init_database()
         self.monitoring_enabled = True
         self.start_monitoring()
     
     def init_database(self):
         """Initialize analytics database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.db.writer() as conn:
+            self.create_tables(conn.cursor())
+            self.apply_migrations(conn)
+        self.enable_incremental_vacuum()
+        print("📊 Analytics database initialized")
+    
+    def enable_incremental_vacuum(self):
+        """Switch the database to incremental auto-vacuum (one-time full VACUUM)"""
+        if self.db.execute_maintenance('PRAGMA auto_vacuum')[0][0] != 2:
+            self.db.execute_maintenance('PRAGMA auto_vacuum = INCREMENTAL')
+            self.db.execute_maintenance('VACUUM')
+            print("🧹 Enabled incremental vacuum on analytics database")
+    
+    def apply_migrations(self, conn):
+        """Apply pending schema migrations"""
+        current_version = conn.execute('PRAGMA user_version').fetchone()[0]
         
+        for version, description, statements in ANALYTICS_MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version}')
+            print(f"🛠️ Applied analytics migration {version}: {description}")
+    
+    def create_tables(self, cursor):
+        """Create analytics tables"""
         # Create tables
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS content_performance (
@@ -63,9 +295,68 @@ class VitalFlowAnalytics:
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        print("📊 Analytics database initialized")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_watermarks (
+                source TEXT PRIMARY KEY,
+                dir_mtime_ns INTEGER DEFAULT 0
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                source TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (source, name)
+            ) WITHOUT ROWID
+        ''')
+        
+        self.create_rollups(cursor)
+    
+    def create_rollups(self, cursor):
+        """Create rollup tables kept current by triggers on content_performance"""
+        metric_columns = ',\n'.join(f'                total_{metric} REAL DEFAULT 0' for metric in ROLLUP_METRICS)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS performance_rollups (
+                dimension TEXT NOT NULL,
+                key TEXT NOT NULL,
+                posts INTEGER DEFAULT 0,
+{metric_columns},
+                PRIMARY KEY (dimension, key)
+            )
+        ''')
+        
+        # Triggers run inside the inserting transaction, and only for rows actually
+        # inserted, so INSERT OR IGNORE duplicates never double count
+        changed = ', '.join(ROLLUP_METRICS)
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_performance_rollup_insert
+            AFTER INSERT ON content_performance
+            BEGIN {rollup_upsert_sql('NEW', '')} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_performance_rollup_update
+            AFTER UPDATE OF {changed} ON content_performance
+            BEGIN {rollup_upsert_sql('OLD', '-', count_posts=False)} {rollup_upsert_sql('NEW', '', count_posts=False)} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS content_performance_rollup_delete
+            AFTER DELETE ON content_performance
+            BEGIN {rollup_upsert_sql('OLD', '-')} END
+        ''')
+        
+        # Backfill once for databases that predate the rollups
+        cursor.execute('SELECT COUNT(*) FROM performance_rollups')
+        if cursor.fetchone()[0] == 0:
+            sums = ', '.join(f'SUM(COALESCE({metric}, 0))' for metric in ROLLUP_METRICS)
+            columns = ', '.join(f'total_{metric}' for metric in ROLLUP_METRICS)
+            for dimension, key in ROLLUP_DIMENSIONS:
+                key_expr = key.format(row='content_performance')
+                cursor.execute(f'''
+                    INSERT INTO performance_rollups (dimension, key, posts, {columns})
+                    SELECT '{dimension}', {key_expr}, COUNT(*), {sums}
+                    FROM content_performance
+                    GROUP BY {key_expr}
+                ''')
     
     def start_monitoring(self):
         """Start background monitoring"""
@@ -80,6 +371,9 @@ class VitalFlowAnalytics:
                 self.collect_system_metrics()
                 self.update_content_performance()
                 self.calculate_business_metrics()
+                self.refresh_dashboard_snapshot()
+                if time.time() - self.last_retention_run >= self.retention_policy['interval_seconds']:
+                    self.apply_retention()
                 time.sleep(300)  # Check every 5 minutes
             except Exception as e:
                 print(f"❌ Monitoring error: {e}")
@@ -97,118 +391,195 @@ class VitalFlowAnalytics:
                 data = response.json()
                 status = data.get('status', {})
                 
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO system_metrics 
-                    (content_queue_size, posts_today, system_status, api_response_time)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    status.get('content_queue', 0),
-                    status.get('posts_published_today', 0),
-                    status.get('system_status', 'unknown'),
-                    api_response_time
-                ))
-                
-                conn.commit()
-                conn.close()
+                with self.db.writer() as conn:
+                    conn.execute('''
+                        INSERT INTO system_metrics 
+                        (content_queue_size, posts_today, system_status, api_response_time)
+                        VALUES (?, ?, ?, ?)
+                    ''', (
+                        status.get('content_queue', 0),
+                        status.get('posts_published_today', 0),
+                        status.get('system_status', 'unknown'),
+                        api_response_time
+                    ))
                 
         except Exception as e:
             print(f"Error collecting system metrics: {e}")
     
     def update_content_performance(self):
-        """Update content performance metrics"""
+        """Ingest newly posted content into content_performance"""
         try:
             # Get posted content
             posted_dir = "/home/ubuntu/posted_content"
             if not os.path.exists(posted_dir):
                 return
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self.db.reader() as conn:
+                row = conn.execute('''
+                    SELECT dir_mtime_ns FROM ingest_watermarks WHERE source = ?
+                ''', ('posted_content',)).fetchone()
+                last_dir_mtime = row[0] if row else 0
             
-            for filename in os.listdir(posted_dir):
-                if filename.startswith('posted_') and filename.endswith('.json'):
-                    filepath = os.path.join(posted_dir, filename)
-                    
+            # Nothing was added to the directory since the last pass
+            dir_mtime = os.stat(posted_dir).st_mtime_ns
+            if dir_mtime == last_dir_mtime:
+                return
+            
+            with self.db.reader() as conn:
+                ingested_names = {name for (name,) in conn.execute('''
+                    SELECT name FROM ingested_files WHERE source = ?
+                ''', ('posted_content',))}
+            
+            rows = []
+            ingested = []
+            for filename, filepath in self.scan_new_posted_files(posted_dir, ingested_names):
+                try:
                     with open(filepath, 'r') as f:
                         content = json.load(f)
-                    
-                    content_id = content.get('id')
-                    
-                    # Check if already in database
-                    cursor.execute('SELECT id FROM content_performance WHERE content_id = ?', (content_id,))
-                    if cursor.fetchone():
-                        continue
-                    
-                    # Simulate performance metrics (in real implementation, get from TikTok API)
-                    import random
-                    views = random.randint(1000, 50000)
-                    likes = int(views * random.uniform(0.02, 0.08))
-                    shares = int(views * random.uniform(0.005, 0.02))
-                    comments = int(views * random.uniform(0.01, 0.03))
-                    engagement_rate = (likes + shares + comments) / views * 100
-                    
-                    cursor.execute('''
-                        INSERT INTO content_performance 
-                        (content_id, product_name, template_type, generated_at, posted_at, 
-                         views, likes, shares, comments, engagement_rate)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        content_id,
-                        content.get('product', {}).get('name', 'Unknown'),
-                        content.get('template', {}).get('type', 'Unknown'),
-                        content.get('generated_at'),
-                        content.get('posted_at'),
-                        views, likes, shares, comments, engagement_rate
-                    ))
+                except (OSError, ValueError) as e:
+                    # Possibly still being written; retry on the next pass
+                    print(f"Deferring unreadable posted file {filename}: {e}")
+                    dir_mtime = 0
+                    continue
+                
+                # Simulate performance metrics (in real implementation, get from TikTok API)
+                import random
+                views = random.randint(1000, 50000)
+                likes = int(views * random.uniform(0.02, 0.08))
+                shares = int(views * random.uniform(0.005, 0.02))
+                comments = int(views * random.uniform(0.01, 0.03))
+                engagement_rate = (likes + shares + comments) / views * 100
+                
+                rows.append((
+                    content.get('id'),
+                    content.get('product', {}).get('name', 'Unknown'),
+                    content.get('template', {}).get('type', 'Unknown'),
+                    content.get('generated_at'),
+                    content.get('posted_at'),
+                    views, likes, shares, comments, engagement_rate
+                ))
+                ingested.append(('posted_content', filename))
+            
+            with self.db.writer() as conn:
+                conn.executemany('''
+                    INSERT OR IGNORE INTO content_performance 
+                    (content_id, product_name, template_type, generated_at, posted_at, 
+                     views, likes, shares, comments, engagement_rate)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
+                conn.executemany('''
+                    INSERT OR IGNORE INTO ingested_files (source, name) VALUES (?, ?)
+                ''', ingested)
+                conn.execute('''
+                    INSERT OR REPLACE INTO ingest_watermarks (source, dir_mtime_ns) VALUES (?, ?)
+                ''', ('posted_content', dir_mtime))
             
-            conn.commit()
-            conn.close()
+            if rows:
+                print(f"📥 Ingested {len(rows)} new posted content files")
             
         except Exception as e:
             print(f"Error updating content performance: {e}")
     
+    def scan_new_posted_files(self, posted_dir, ingested_names):
+        """List posted files not ingested yet, by name
+
+        Names rather than mtimes: files are renamed into posted_dir and keep the mtime
+        they were written with, which can be older than files already ingested.
+        """
+        new_files = []
+        
+        with os.scandir(posted_dir) as entries:
+            for entry in entries:
+                if not (entry.name.startswith('posted_') and entry.name.endswith('.json')):
+                    continue
+                if entry.name in ingested_names:
+                    continue
+                
+                new_files.append((entry.name, entry.path))
+        
+        new_files.sort()
+        return new_files
+    
+    def apply_retention(self):
+        """Downsample old system_metrics, prune raw rows and reclaim free pages"""
+        try:
+            self.last_retention_run = time.time()
+            now = datetime.utcnow()
+            raw_cutoff = (now - timedelta(days=self.retention_policy['raw_days'])).strftime('%Y-%m-%d %H:00:00')
+            hourly_cutoff = (now - timedelta(days=self.retention_policy['hourly_days'])).strftime('%Y-%m-%d 00:00:00')
+            
+            with self.db.writer() as conn:
+                # Cutoffs are bucket-aligned so each bucket is folded in exactly once
+                conn.execute(downsample_insert_sql('system_metrics_hourly', 'system_metrics',
+                                                   '%Y-%m-%d %H:00:00', True), (raw_cutoff,))
+                raw_pruned = conn.execute('DELETE FROM system_metrics WHERE timestamp < ?', (raw_cutoff,)).rowcount
+                
+                conn.execute(downsample_insert_sql('system_metrics_daily', 'system_metrics_hourly',
+                                                   '%Y-%m-%d 00:00:00', False), (hourly_cutoff,))
+                hourly_pruned = conn.execute('DELETE FROM system_metrics_hourly WHERE bucket < ?', (hourly_cutoff,)).rowcount
+            
+            page_size = self.db.execute_maintenance('PRAGMA page_size')[0][0]
+            free_before = self.db.execute_maintenance('PRAGMA freelist_count')[0][0]
+            self.db.incremental_vacuum(self.retention_policy['vacuum_pages'])
+            free_after = self.db.execute_maintenance('PRAGMA freelist_count')[0][0]
+            
+            report = {
+                'ran_at': datetime.now().isoformat(),
+                'raw_rows_pruned': raw_pruned,
+                'hourly_rows_pruned': hourly_pruned,
+                'pages_reclaimed': free_before - free_after,
+                'bytes_reclaimed': (free_before - free_after) * page_size,
+                'free_pages_remaining': free_after,
+                'db_size_bytes': os.path.getsize(self.db_path)
+            }
+            self.last_retention_report = report
+            
+            if raw_pruned or hourly_pruned or report['bytes_reclaimed']:
+                print(f"🧹 Retention: pruned {raw_pruned} raw and {hourly_pruned} hourly rows, "
+                      f"reclaimed {report['bytes_reclaimed']} bytes")
+            return report
+            
+        except Exception as e:
+            print(f"Error applying retention: {e}")
+            return None
+    
     def calculate_business_metrics(self):
         """Calculate daily business metrics"""
         try:
             today = datetime.now().date()
+            tomorrow = today + timedelta(days=1)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get today's content performance
-            cursor.execute('''
-                SELECT SUM(views), SUM(likes + shares + comments), COUNT(*)
-                FROM content_performance 
-                WHERE DATE(posted_at) = ?
-            ''', (today,))
-            
-            result = cursor.fetchone()
-            total_views = result[0] or 0
-            total_engagement = result[1] or 0
-            posts_count = result[2] or 0
-            
-            # Simulate revenue (in real implementation, get from TikTok Shop API)
-            import random
-            if total_views > 0:
-                conversion_rate = random.uniform(0.01, 0.03)  # 1-3% conversion
-                avg_order_value = random.uniform(35, 45)  # Average product price
-                total_revenue = total_views * conversion_rate * avg_order_value
-            else:
-                conversion_rate = 0
-                total_revenue = 0
-            
-            # Update or insert business metrics
-            cursor.execute('''
-                INSERT OR REPLACE INTO business_metrics 
-                (date, total_views, total_engagement, total_revenue, conversion_rate)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (today, total_views, total_engagement, total_revenue, conversion_rate))
-            
-            conn.commit()
-            conn.close()
+            with self.db.writer() as conn:
+                cursor = conn.cursor()
+                
+                # Get today's content performance (range filter so the posted_at index is used)
+                cursor.execute('''
+                    SELECT SUM(views), SUM(likes + shares + comments), COUNT(*)
+                    FROM content_performance 
+                    WHERE posted_at >= ? AND posted_at < ?
+                ''', (today.isoformat(), tomorrow.isoformat()))
+                
+                result = cursor.fetchone()
+                total_views = result[0] or 0
+                total_engagement = result[1] or 0
+                posts_count = result[2] or 0
+                
+                # Simulate revenue (in real implementation, get from TikTok Shop API)
+                import random
+                if total_views > 0:
+                    conversion_rate = random.uniform(0.01, 0.03)  # 1-3% conversion
+                    avg_order_value = random.uniform(35, 45)  # Average product price
+                    total_revenue = total_views * conversion_rate * avg_order_value
+                else:
+                    conversion_rate = 0
+                    total_revenue = 0
+                
+                # Update or insert business metrics
+                cursor.execute('''
+                    INSERT OR REPLACE INTO business_metrics 
+                    (date, total_views, total_engagement, total_revenue, conversion_rate)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (today, total_views, total_engagement, total_revenue, conversion_rate))
             
         except Exception as e:
             print(f"Error calculating business metrics: {e}")
@@ -216,68 +587,58 @@ class VitalFlowAnalytics:
     def get_dashboard_data(self):
         """Get comprehensive dashboard data"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # System overview
-            cursor.execute('''
-                SELECT content_queue_size, posts_today, system_status, api_response_time
-                FROM system_metrics 
-                ORDER BY timestamp DESC LIMIT 1
-            ''')
-            system_data = cursor.fetchone()
-            
-            # Content performance summary
-            cursor.execute('''
-                SELECT 
-                    COUNT(*) as total_posts,
-                    SUM(views) as total_views,
-                    SUM(likes) as total_likes,
-                    SUM(shares) as total_shares,
-                    SUM(comments) as total_comments,
-                    AVG(engagement_rate) as avg_engagement
-                FROM content_performance
-            ''')
-            content_summary = cursor.fetchone()
-            
-            # Top performing content
-            cursor.execute('''
-                SELECT content_id, product_name, template_type, views, engagement_rate
-                FROM content_performance 
-                ORDER BY views DESC LIMIT 5
-            ''')
-            top_content = cursor.fetchall()
-            
-            # Template performance
-            cursor.execute('''
-                SELECT 
-                    template_type,
-                    COUNT(*) as posts,
-                    AVG(views) as avg_views,
-                    AVG(engagement_rate) as avg_engagement
-                FROM content_performance 
-                GROUP BY template_type
-                ORDER BY avg_engagement DESC
-            ''')
-            template_performance = cursor.fetchall()
-            
-            # Business metrics (last 7 days)
-            cursor.execute('''
-                SELECT date, total_views, total_engagement, total_revenue
-                FROM business_metrics 
-                ORDER BY date DESC LIMIT 7
-            ''')
-            business_trends = cursor.fetchall()
-            
-            # Recent system metrics
-            cursor.execute('''
-                SELECT timestamp, content_queue_size, posts_today, api_response_time
-                FROM system_metrics 
-                ORDER BY timestamp DESC LIMIT 24
-            ''')
-            system_trends = cursor.fetchall()
-            
-            conn.close()
+            with self.db.reader() as conn:
+                cursor = conn.cursor()
+                
+                # System overview
+                cursor.execute('''
+                    SELECT content_queue_size, posts_today, system_status, api_response_time
+                    FROM system_metrics 
+                    ORDER BY timestamp DESC LIMIT 1
+                ''')
+                system_data = cursor.fetchone()
+                
+                # Content performance summary
+                cursor.execute('''
+                    SELECT 
+                        posts as total_posts,
+                        CAST(total_views AS INTEGER),
+                        CAST(total_likes AS INTEGER),
+                        CAST(total_shares AS INTEGER),
+                        CAST(total_comments AS INTEGER),
+                        total_engagement_rate / posts as avg_engagement
+                    FROM performance_rollups
+                    WHERE dimension = 'all' AND posts > 0
+                ''')
+                content_summary = cursor.fetchone()
+                
+                # Top performing content
+                cursor.execute('''
+                    SELECT content_id, product_name, template_type, views, engagement_rate
+                    FROM content_performance 
+                    ORDER BY views DESC LIMIT 5
+                ''')
+                top_content = cursor.fetchall()
+                
+                # Template and product performance
+                template_performance = self.get_rollup_performance(cursor, 'template')
+                product_performance = self.get_rollup_performance(cursor, 'product')
+                
+                # Business metrics (last 7 days)
+                cursor.execute('''
+                    SELECT date, total_views, total_engagement, total_revenue
+                    FROM business_metrics 
+                    ORDER BY date DESC LIMIT 7
+                ''')
+                business_trends = cursor.fetchall()
+                
+                # Recent system metrics
+                cursor.execute('''
+                    SELECT timestamp, content_queue_size, posts_today, api_response_time
+                    FROM system_metrics 
+                    ORDER BY timestamp DESC LIMIT 24
+                ''')
+                system_trends = cursor.fetchall()
             
             return {
                 'system_overview': {
@@ -292,7 +653,7 @@ class VitalFlowAnalytics:
                     'total_likes': content_summary[2] if content_summary else 0,
                     'total_shares': content_summary[3] if content_summary else 0,
                     'total_comments': content_summary[4] if content_summary else 0,
-                    'avg_engagement': round(content_summary[5] or 0, 2)
+                    'avg_engagement': round(content_summary[5] or 0, 2) if content_summary else 0
                 },
                 'top_content': [
                     {
@@ -311,6 +672,14 @@ class VitalFlowAnalytics:
                         'avg_engagement': round(row[3], 2)
                     } for row in template_performance
                 ],
+                'product_performance': [
+                    {
+                        'product_name': row[0],
+                        'posts': row[1],
+                        'avg_views': int(row[2]),
+                        'avg_engagement': round(row[3], 2)
+                    } for row in product_performance
+                ],
                 'business_trends': [
                     {
                         'date': row[0],
@@ -333,10 +702,122 @@ class VitalFlowAnalytics:
             print(f"Error getting dashboard data: {e}")
             return {}
     
-    def get_performance_insights(self):
+    def get_system_metrics_range(self, start, end, limit=1000):
+        """Get system metric samples with start <= timestamp < end, oldest first"""
+        with self.db.reader() as conn:
+            rows = conn.execute('''
+                SELECT timestamp, content_queue_size, posts_today, system_status, api_response_time
+                FROM system_metrics
+                WHERE timestamp >= ? AND timestamp < ?
+                ORDER BY timestamp LIMIT ?
+            ''', (start.strftime('%Y-%m-%d %H:%M:%S'), end.strftime('%Y-%m-%d %H:%M:%S'), limit)).fetchall()
+        
+        return [
+            {
+                'timestamp': row[0],
+                'queue_size': row[1],
+                'posts_today': row[2],
+                'system_status': row[3],
+                'response_time': round(row[4] or 0, 3)
+            } for row in rows
+        ]
+    
+    def get_content_performance_range(self, start, end, limit=1000):
+        """Get content posted with start <= posted_at < end, oldest first
+
+        start and end are naive UTC; posted_at is stored in the poster's local time.
+        """
+        start, end = utc_to_local(start), utc_to_local(end)
+        with self.db.reader() as conn:
+            rows = conn.execute('''
+                SELECT content_id, product_name, template_type, posted_at,
+                       views, likes, shares, comments, engagement_rate
+                FROM content_performance
+                WHERE posted_at >= ? AND posted_at < ?
+                ORDER BY posted_at LIMIT ?
+            ''', (start.isoformat(), end.isoformat(), limit)).fetchall()
+        
+        return [
+            {
+                'content_id': row[0],
+                'product_name': row[1],
+                'template_type': row[2],
+                'posted_at': row[3],
+                'views': row[4],
+                'likes': row[5],
+                'shares': row[6],
+                'comments': row[7],
+                'engagement_rate': round(row[8] or 0, 2)
+            } for row in rows
+        ]
+    
+    def get_business_metrics_range(self, start, end):
+        """Get daily business metrics for the dates from start to end inclusive, oldest first
+
+        start and end are naive UTC; business_metrics.date is a local calendar date.
+        """
+        start, end = utc_to_local(start), utc_to_local(end)
+        with self.db.reader() as conn:
+            rows = conn.execute('''
+                SELECT date, total_views, total_engagement, total_revenue, conversion_rate
+                FROM business_metrics
+                WHERE date >= ? AND date <= ?
+                ORDER BY date
+            ''', (start.date().isoformat(), end.date().isoformat())).fetchall()
+        
+        return [
+            {
+                'date': row[0],
+                'views': row[1],
+                'engagement': row[2],
+                'revenue': round(row[3] or 0, 2),
+                'conversion_rate': round(row[4] or 0, 4)
+            } for row in rows
+        ]
+    
+    def get_rollup_performance(self, cursor, dimension):
+        """Get per-key post counts and averages from the rollup table"""
+        cursor.execute('''
+            SELECT 
+                key,
+                posts,
+                total_views / posts as avg_views,
+                total_engagement_rate / posts as avg_engagement
+            FROM performance_rollups 
+            WHERE dimension = ? AND posts > 0
+            ORDER BY avg_engagement DESC
+        ''', (dimension,))
+        return cursor.fetchall()
+    
+    def refresh_dashboard_snapshot(self):
+        """Materialize the dashboard and insights payloads for the API to serve from memory"""
+        dashboard_data = self.get_dashboard_data()
+        insights = self.get_performance_insights(dashboard_data)
+        
+        snapshot = {'generated_at': datetime.now().isoformat()}
+        for name, payload in (('dashboard', {'success': True, 'data': dashboard_data}),
+                              ('insights', {'success': True, 'insights': insights})):
+            body = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+            snapshot[name] = {
+                'body': body,
+                'etag': hashlib.sha1(body).hexdigest()
+            }
+        
+        with self.snapshot_lock:
+            self.snapshot = snapshot
+        return snapshot
+    
+    def get_dashboard_snapshot(self):
+        """Get the current snapshot, building it on first use"""
+        with self.snapshot_lock:
+            snapshot = self.snapshot
+        return snapshot or self.refresh_dashboard_snapshot()
+    
+    def get_performance_insights(self, dashboard_data=None):
         """Get AI-powered performance insights"""
         try:
-            dashboard_data = self.get_dashboard_data()
+            if dashboard_data is None:
+                dashboard_data = self.get_dashboard_data()
             
             insights = []
             
@@ -402,15 +883,20 @@ class VitalFlowAnalytics:
 app = Flask(__name__)
 analytics = VitalFlowAnalytics()
 
+def snapshot_response(name):
+    """Serve a precomputed snapshot payload with ETag revalidation"""
+    snapshot = analytics.get_dashboard_snapshot()
+    response = app.response_class(snapshot[name]['body'], mimetype='application/json')
+    response.set_etag(snapshot[name]['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Snapshot-Generated-At'] = snapshot['generated_at']
+    return response.make_conditional(request)
+
 @app.route('/api/analytics/dashboard', methods=['GET'])
 def get_dashboard():
     """Get dashboard data"""
     try:
-        data = analytics.get_dashboard_data()
-        return jsonify({
-            'success': True,
-            'data': data
-        })
+        return snapshot_response('dashboard')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -418,10 +904,104 @@ def get_dashboard():
 def get_insights():
     """Get performance insights"""
     try:
-        insights = analytics.get_performance_insights()
+        return snapshot_response('insights')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def parse_utc(value):
+    """Parse an ISO timestamp into naive UTC, the form stored timestamps use (naive input is taken as UTC)"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def utc_to_local(value):
+    """Convert a naive UTC datetime to naive local time, the form posted_at and business dates use"""
+    return value.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+def parse_time_range(default_span):
+    """Parse ISO 'from'/'to' query parameters into a half-open UTC datetime range"""
+    end = request.args.get('to')
+    end = parse_utc(end) if end else datetime.utcnow()
+    start = request.args.get('from')
+    start = parse_utc(start) if start else end - default_span
+    
+    if start >= end:
+        raise ValueError("'from' must be earlier than 'to'")
+    return start, end
+
+@app.route('/api/analytics/system-metrics', methods=['GET'])
+def get_system_metrics():
+    """Get system metric samples for a time range"""
+    try:
+        start, end = parse_time_range(timedelta(days=1))
+        limit = min(request.args.get('limit', 1000, type=int), 10000)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        return jsonify({
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'metrics': analytics.get_system_metrics_range(start, end, limit)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/content-performance', methods=['GET'])
+def get_content_performance():
+    """Get content performance for posts in a time range"""
+    try:
+        start, end = parse_time_range(timedelta(days=7))
+        limit = min(request.args.get('limit', 1000, type=int), 10000)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        return jsonify({
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'content': analytics.get_content_performance_range(start, end, limit)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/business-metrics', methods=['GET'])
+def get_business_metrics():
+    """Get daily business metrics for a date range"""
+    try:
+        start, end = parse_time_range(timedelta(days=30))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        return jsonify({
+            'success': True,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'metrics': analytics.get_business_metrics_range(start, end)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/analytics/retention', methods=['GET'])
+def get_retention():
+    """Get the retention policy and the last retention report"""
+    return jsonify({
+        'success': True,
+        'policy': analytics.retention_policy,
+        'last_report': analytics.last_retention_report
+    })
+
+@app.route('/api/analytics/db-stats', methods=['GET'])
+def get_db_stats():
+    """Get analytics database connection pool statistics"""
+    try:
         return jsonify({
             'success': True,
-            'insights': insights
+            'stats': analytics.db.get_stats()
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -2,8 +2,9 @@
 
 import sys
 import os
-import requests
 import json
+import functools
+import time
 from datetime import datetime
 import random
 
@@ -11,12 +12,31 @@ import random
 sys.path.append('/home/ubuntu/vitalflow-automation-api')
 
 from content_generation_service import ContentGenerationService
+from image_render_pool import ImageRenderPool
+from content_index import ContentIndex
+from content_store import ContentDedupStore, atomic_write_json, content_hash
+from image_backends import create_backend
+from image_cache import ImageArtifactCache
 
 class VitalFlowContentGenerator:
     def __init__(self):
         self.service = ContentGenerationService()
         self.generated_images_dir = "/home/ubuntu/generated_content/images"
         self.ensure_directories()
+        self.content_index = ContentIndex("/home/ubuntu/generated_content", posted_dir="/home/ubuntu/posted_content")
+        self.dedup_store = ContentDedupStore("/home/ubuntu/generated_content/content_dedup.db")
+        self.max_duplicate_retries = 3
+        self.image_cache = ImageArtifactCache(os.path.join(self.generated_images_dir, "artifacts"),
+                                              max_bytes=512 * 1024 * 1024)
+        self.image_params = {'width': 1080, 'height': 1920, 'format': 'png'}
+        self.image_backend = create_backend('local')
+        # Layout-only image types (thumbnails, split screens) are composited, not generated
+        self.compositor_backend = create_backend('compositor')
+        self.image_backends = {backend.name: backend for backend in (self.image_backend, self.compositor_backend)}
+        # The images of a package render concurrently, at most max_concurrency at a time per backend
+        self.render_pool = ImageRenderPool(max_workers=4, timeout_seconds=120, backend_limits={
+            backend.name: backend.max_concurrency for backend in self.image_backends.values()
+        })
     
     def ensure_directories(self):
         """Ensure all necessary directories exist"""
@@ -27,36 +47,35 @@ class VitalFlowContentGenerator:
         try:
             print("🚀 Starting automated content generation...")
             
-            # Get products and templates
-            products_response = requests.get("http://localhost:5000/api/automation/products")
-            products_data = products_response.json()
-            products = products_data['products']
+            # Get products and templates (cached by the service's API client)
+            products = self.service.client.get_products()
+            templates = self.service.client.get_templates()
             
-            templates_response = requests.get("http://localhost:5000/api/automation/content-templates")
-            templates_data = templates_response.json()
-            templates = templates_data['templates']
-            
-            # Select random product and template
-            selected_product = random.choice(products)
-            selected_template = random.choice(templates)
+            # Draw until the content is new; a duplicate is caught before any image work
+            for _ in range(1 + self.max_duplicate_retries):
+                # Select random product and template
+                selected_product = random.choice(products)
+                selected_template = random.choice(templates)
+                
+                # Generate content via API
+                content = self.service.client.generate_content(selected_product['id'], selected_template['type'])
+                
+                planned_images = self.plan_images(selected_product, selected_template, content)
+                package_hash = content_hash(content, [image['prompt'] for image in planned_images])
+                duplicate_of = self.dedup_store.find_package(package_hash)
+                if not duplicate_of:
+                    break
+                print(f"♻️ Generated content duplicates {duplicate_of}, drawing again...")
+            else:
+                print(f"❌ Only duplicates after {1 + self.max_duplicate_retries} attempts, skipping")
+                return None
             
             print(f"📦 Selected Product: {selected_product['name']}")
             print(f"🎬 Selected Template: {selected_template['type']}")
-            
-            # Generate content via API
-            content_response = requests.post("http://localhost:5000/api/automation/generate-content", 
-                                           json={
-                                               'product_id': selected_product['id'],
-                                               'template_type': selected_template['type']
-                                           })
-            
-            content_data = content_response.json()
-            content = content_data['content']
-            
             print(f"✍️ Generated Hook: {content['hook']}")
             
             # Generate actual images using the media generation tools
-            images = self.generate_real_images(selected_product, selected_template, content)
+            images, image_report = self.generate_real_images(selected_product, selected_template, content, planned_images)
             
             # Create complete content package
             content_package = {
@@ -65,12 +84,15 @@ class VitalFlowContentGenerator:
                 'template': selected_template,
                 'content': content,
                 'images': images,
+                'image_generation': image_report,
+                'content_hash': package_hash,
                 'generated_at': datetime.now().isoformat(),
                 'status': 'ready_for_posting'
             }
             
             # Save content package
             self.save_content_package(content_package)
+            self.dedup_store.add_package(package_hash, content_package['id'])
             
             print("✅ Content generation completed successfully!")
             return content_package
@@ -79,42 +101,86 @@ class VitalFlowContentGenerator:
             print(f"❌ Error generating content: {e}")
             return None
     
-    def generate_real_images(self, product, template, content):
-        """Generate actual images using media generation tools"""
+    def plan_images(self, product, template, content):
+        """Describe the images a package needs (type, path and prompt) without generating them"""
         images = []
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        try:
-            # Generate main content image based on template type
-            if template['type'] == 'grwm':
-                main_image = self.create_grwm_image(product, content, timestamp)
-            elif template['type'] == 'education':
-                main_image = self.create_education_image(product, content, timestamp)
-            elif template['type'] == 'transformation':
-                main_image = self.create_transformation_image(product, content, timestamp)
-            elif template['type'] == 'myth_busting':
-                main_image = self.create_myth_busting_image(product, content, timestamp)
-            else:
-                main_image = self.create_trending_image(product, content, timestamp)
-            
-            if main_image:
-                images.append(main_image)
-            
-            # Generate product showcase image
-            product_image = self.create_product_showcase_image(product, timestamp)
-            if product_image:
-                images.append(product_image)
-            
-            # Generate thumbnail
-            thumbnail = self.create_thumbnail_image(product, template, timestamp)
-            if thumbnail:
-                images.append(thumbnail)
-            
-        except Exception as e:
-            print(f"Error generating images: {e}")
+        # Main content image based on template type
+        if template['type'] == 'grwm':
+            main_image = self.create_grwm_image(product, content, timestamp)
+        elif template['type'] == 'education':
+            main_image = self.create_education_image(product, content, timestamp)
+        elif template['type'] == 'transformation':
+            main_image = self.create_transformation_image(product, content, timestamp)
+        elif template['type'] == 'myth_busting':
+            main_image = self.create_myth_busting_image(product, content, timestamp)
+        else:
+            main_image = self.create_trending_image(product, content, timestamp)
+        
+        for image in (main_image,
+                      self.create_product_showcase_image(product, timestamp),
+                      self.create_thumbnail_image(product, template, timestamp)):
+            if image:
+                image.update(backend=self.backend_for(image['type']).name,
+                             product_id=product['id'], product_name=product['name'])
+                images.append(image)
         
         return images
     
+    def backend_for(self, image_type):
+        """Backend that renders an image type"""
+        if image_type in self.compositor_backend.image_types:
+            return self.compositor_backend
+        return self.image_backend
+    
+    def generate_real_images(self, product, template, content, planned_images=None):
+        """Generate actual images using media generation tools, concurrently and reusing cached renders
+
+        Returns (images, report); images holds every image that rendered, report the per-image
+        latency and any failures, so one failed image does not lose the others.
+        """
+        planned_images = planned_images or self.plan_images(product, template, content)
+        started = time.perf_counter()
+        
+        jobs = [
+            (image['type'], image.get('backend', 'default'), functools.partial(self.render_cached_image, image))
+            for image in planned_images
+        ]
+        results = self.render_pool.run(jobs)
+        
+        images = []
+        report = {'latency_ms': {}, 'failed': []}
+        for result in results:
+            if result['ok']:
+                images.append(dict(result['value'], latency_ms=result['latency_ms']))
+                report['latency_ms'][result['name']] = result['latency_ms']
+            else:
+                print(f"Error generating {result['name']} image: {result['error']}")
+                report['failed'].append({'type': result['name'], 'error': result['error']})
+        report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        
+        return images, report
+    
+    def render_cached_image(self, image):
+        """Render one planned image through the artifact cache"""
+        params = dict(self.image_params, image_type=image['type'], backend=image['backend'])
+        path, cached = self.image_cache.get_or_render(
+            image['prompt'], params, lambda output_path: self.render_image(image, output_path)
+        )
+        if not path:
+            return image
+        if cached:
+            print(f"♻️ Reusing cached {image['type']} image: {path}")
+        # The package keeps its own link to the image; cache eviction only drops the cache's name
+        return dict(image, path=self.image_cache.export(path, image['path']), cached=cached)
+    
+    def render_image(self, image, output_path):
+        """Render a planned image to output_path with the backend it was planned for"""
+        request = dict(self.image_params, prompt=image['prompt'], image_type=image['type'],
+                       product_id=image['product_id'], product_name=image['product_name'])
+        self.image_backends[image['backend']].render(request, output_path)
+    
     def create_grwm_image(self, product, content, timestamp):
         """Create Get Ready With Me style image"""
         image_path = f"{self.generated_images_dir}/grwm_{product['id']}_{timestamp}.png"
@@ -228,8 +294,9 @@ class VitalFlowContentGenerator:
         """Save content package to file"""
         filename = f"/home/ubuntu/generated_content/content_package_{content_package['id']}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(content_package, f, indent=2)
+        atomic_write_json(filename, content_package)
+        
+        self.content_index.add(content_package, filename)
         
         print(f"💾 Content package saved: {filename}")
         return filename
@@ -251,6 +318,10 @@ def main():
         print(f"🎬 Template: {content_package['template']['type']}")
         print(f"✍️ Hook: {content_package['content']['hook']}")
         print(f"🎨 Images Generated: {len(content_package['images'])}")
+        image_stats = generator.image_cache.get_stats()
+        print(f"♻️ Duplicate packages skipped: {generator.dedup_store.get_stats()['package_hit_rate']:.0%} of draws")
+        print(f"🗃️ Image cache: {image_stats['hits']} hits, {image_stats['misses']} misses, "
+              f"{image_stats['evictions']} evictions")
         
         # Display image information
         for i, image in enumerate(content_package['images'], 1):